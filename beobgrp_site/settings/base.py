@@ -86,6 +86,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
+    "home.middleware.PageCacheMiddleware",
 ]
 
 ROOT_URLCONF = "beobgrp_site.urls"
@@ -128,6 +129,55 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# DJANGO_CACHE_BACKEND selects where cached data is kept: "locmem" (default,
+# per process), "file" (below DJANGO_CACHE_DIR) or "redis" (a Redis compatible
+# server at DJANGO_CACHE_LOCATION, requires the redis package). Caches are
+# invalidated by the process that changed the data, so any setup with several
+# processes (Gunicorn workers, management commands, task workers) needs "file"
+# or "redis" for the others to notice.
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_BACKEND = os.environ.get("DJANGO_CACHE_BACKEND", "locmem")
+CACHE_DIR = os.environ.get("DJANGO_CACHE_DIR", os.path.join(BASE_DIR, "cache"))
+CACHE_LOCATION = os.environ.get("DJANGO_CACHE_LOCATION", "redis://localhost:6379/0")
+
+
+def _get_cache_config(name: str, max_entries: int) -> dict:
+    config: dict = {"BACKEND": CACHE_BACKENDS[CACHE_BACKEND], "KEY_PREFIX": name}
+    if CACHE_BACKEND == "locmem":
+        config["LOCATION"] = name
+    elif CACHE_BACKEND == "file":
+        config["LOCATION"] = os.path.join(CACHE_DIR, name)
+    else:
+        config["LOCATION"] = CACHE_LOCATION
+    if CACHE_BACKEND != "redis":
+        config["OPTIONS"] = {"MAX_ENTRIES": max_entries}
+    return config
+
+
+CACHES = {
+    "default": _get_cache_config("default", max_entries=1000),
+    # Rendered pages for anonymous visitors, see home.page_cache
+    "pages": _get_cache_config("pages", max_entries=5000),
+}
+
+# Full-page cache for anonymous visitors, disabled by default in development so
+# template changes show up immediately. Entries are invalidated when pages are
+# published, so the timeout only bounds how long unused pages are kept.
+PAGE_CACHE_ENABLED = (
+    os.environ.get("DJANGO_PAGE_CACHE", "false" if DEBUG else "true").lower() == "true"
+)
+# Pages showing events expire earlier, as soon as one of the events starts or
+# its reservation opens
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -171,6 +221,16 @@ STATIC_URL = "/static/"
 MEDIA_ROOT = os.environ.get("DJANGO_MEDIA_DIR", os.path.join(BASE_DIR, "media"))
 MEDIA_URL = "/media/"
 
+# Let the front proxy send media files in production: set DJANGO_MEDIA_ACCEL_REDIRECT
+# to an internal nginx location aliasing MEDIA_ROOT (e.g. "/protected-media/"),
+# or DJANGO_MEDIA_X_SENDFILE to "true" for Apache mod_xsendfile
+MEDIA_ACCEL_REDIRECT = os.environ.get("DJANGO_MEDIA_ACCEL_REDIRECT", "")
+MEDIA_X_SENDFILE = os.environ.get("DJANGO_MEDIA_X_SENDFILE", "false").lower() == "true"
+
+# Number of background threads creating image renditions after uploads and
+# publishing, see home/renditions.py. Set to 0 to create them synchronously.
+RENDITION_WORKERS = int(os.environ.get("DJANGO_RENDITION_WORKERS", "2"))
+
 # Storage configuration - Django 4.2+ STORAGES setting
 # Replaces old DEFAULT_FILE_STORAGE and STATICFILES_STORAGE settings
 STORAGES = {
@@ -204,9 +264,26 @@ WAGTAILIMAGES_IMAGE_FORM_BASE = "home.forms.NoGifImageForm"
 
 # Search
 # https://docs.wagtail.org/en/stable/topics/search/backends.html
+# On PostgreSQL the database backend keeps a GIN-indexed tsvector per page and
+# ranks results in the query, weighting fields by their search_fields boost.
+# Stem German words so "Beobachtungsabende" finds "Beobachtungsabend", run
+# ./manage.py reindex_search after changing the configuration.
 WAGTAILSEARCH_BACKENDS = {
     "default": {
         "BACKEND": "wagtail.search.backends.database",
+        "SEARCH_CONFIG": "german",
+    }
+}
+
+# Background tasks, e.g. the search index updates Wagtail enqueues when a page
+# is saved, run in a thread of the web process after the transaction commits.
+# These are django-tasks backends, the framework Wagtail and modelsearch use.
+# Django's built-in django.tasks reads the same setting, but nothing enqueues
+# tasks with it.
+TASKS = {
+    "default": {
+        "BACKEND": "home.task_backend.BackgroundThreadBackend",
+        "OPTIONS": {"WORKERS": 1},
     }
 }
 
@@ -218,7 +295,7 @@ SASS_LOAD_PATH = os.environ.get(
     "SASS_LOAD_PATH", os.path.join(BASE_DIR, "node_modules")
 )
 
-COMPRESS_PRECOMPILERS = (
+COMPRESS_PRECOMPILERS: tuple[tuple[str, str], ...] = (
     ("text/x-scss", f"sass -q --load-path {SASS_LOAD_PATH} " + "{infile}"),
 )
 
@@ -15,6 +15,8 @@ DATABASES = {
 # Disable debug during tests
 DEBUG = False
 
+SECRET_KEY = "django-insecure-test-key"
+
 # Speed up password hashing during tests
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
@@ -23,6 +25,18 @@ PASSWORD_HASHERS = [
 # Disable compressor during tests
 COMPRESS_ENABLED = False
 COMPRESS_OFFLINE = False
+# Leave SCSS uncompiled so rendering pages does not require Dart Sass
+COMPRESS_PRECOMPILERS = ()
+
+# Create renditions synchronously, background threads do not see test transactions
+RENDITION_WORKERS = 0
+
+# Run tasks such as search index updates synchronously for the same reason
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.immediate.ImmediateBackend",
+    }
+}
 
 # Use simple media storage for tests
 DEFAULT_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
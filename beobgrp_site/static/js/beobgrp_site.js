@@ -9,3 +9,59 @@ document.addEventListener("DOMContentLoaded", function () {
         });
     }
 });
+
+// "Load more" buttons replace themselves with the next chunk of items,
+// which the page renders without its layout for XMLHttpRequests.
+// Without JavaScript they are plain links to the next page.
+document.addEventListener("click", function (event) {
+    const button = event.target.closest("[data-load-more]");
+    if (!button) {
+        return;
+    }
+    event.preventDefault();
+    button.classList.add("is-loading");
+
+    fetch(button.href, { headers: { "X-Requested-With": "XMLHttpRequest" } })
+        .then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            return response.text();
+        })
+        .then(function (html) {
+            const container = button.parentElement;
+            container.insertAdjacentHTML("afterend", html);
+            container.remove();
+        })
+        .catch(function () {
+            window.location.href = button.href;
+        });
+});
+
+// Search fields with a suggestion URL offer matching titles, speakers and
+// event types in their datalist while the visitor types.
+document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("[data-suggest-url]").forEach(function (input) {
+        const datalist = document.getElementById(input.getAttribute("list"));
+        let timer = null;
+
+        input.addEventListener("input", function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                const url = input.dataset.suggestUrl + "?query=" + encodeURIComponent(input.value);
+                fetch(url)
+                    .then(function (response) {
+                        return response.ok ? response.json() : { suggestions: [] };
+                    })
+                    .then(function (data) {
+                        datalist.replaceChildren(...data.suggestions.map(function (suggestion) {
+                            const option = document.createElement("option");
+                            option.value = suggestion.text;
+                            return option;
+                        }));
+                    })
+                    .catch(function () {});
+            }, 150);
+        });
+    });
+});
@@ -1,12 +1,13 @@
 from django.conf import settings
 from django.urls import include, path, re_path
 from django.contrib import admin
-from django.views.static import serve
 
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
+from beobgrp_site.views import serve_media
+from home.views import event_feed, event_redirect, events_api
 from search import views as search_views
 
 urlpatterns = [
@@ -14,16 +15,19 @@ urlpatterns = [
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
+    path("search/suggest/", search_views.suggest, name="search_suggest"),
+    path("e/<slug:web_id>", event_redirect, name="event_redirect"),
+    path("events.ics", event_feed, name="event_feed"),
+    path("api/events/", events_api, name="events_api"),
 ]
 
 # Add media serving pattern for production
 if not settings.DEBUG:
     urlpatterns.append(
-        re_path(r"^media/(?P<path>.*)$", serve, {"document_root": settings.MEDIA_ROOT})
+        re_path(r"^media/(?P<path>.*)$", serve_media, name="serve_media")
     )
 
 from django.conf.urls.static import static
-from django.views.static import serve
 
 # Add media serving for development
 if settings.DEBUG:
@@ -0,0 +1,162 @@
+import mimetypes
+import os
+import posixpath
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.http.response import HttpResponseBase
+from django.utils._os import safe_join
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition, require_safe
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileRange:
+    """
+    A file limited to length bytes from its current position.
+
+    It keeps the file descriptor of the underlying file, so WSGI servers with
+    sendfile support (e.g. gunicorn) still send the range zero-copy, bounded
+    by the Content-Length of the response.
+    """
+
+    def __init__(self, file, length: int):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _get_media_path(path: str) -> Path:
+    return Path(safe_join(settings.MEDIA_ROOT, posixpath.normpath(path).lstrip("/")))
+
+
+def _stat_media_file(path: str) -> os.stat_result | None:
+    try:
+        return os.stat(_get_media_path(path))
+    except (OSError, SuspiciousFileOperation):
+        return None
+
+
+def media_etag(request, path: str) -> str | None:
+    statobj = _stat_media_file(path)
+    if statobj is None:
+        return None
+    # Same scheme as nginx: uploads are never modified in place, so
+    # modification time and size identify the content
+    return "{:x}-{:x}".format(statobj.st_mtime_ns, statobj.st_size)
+
+
+def media_last_modified(request, path: str) -> datetime | None:
+    statobj = _stat_media_file(path)
+    if statobj is None:
+        return None
+    return datetime.fromtimestamp(statobj.st_mtime, tz=timezone.utc)
+
+
+def parse_byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Return the first and last byte of a single byte range header, or None if
+    the header should be ignored, e.g. because it asks for several ranges.
+    Raises ValueError if the range lies outside of a file of the given size.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last bytes of the file
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+    if last and int(last) < int(first):
+        return None
+    if int(first) >= size:
+        raise ValueError("Range starts after the end of the file")
+    return int(first), min(int(last), size - 1) if last else size - 1
+
+
+def _range_is_current(request, path: str, statobj: os.stat_result) -> bool:
+    """Check If-Range, which asks for the whole file if it has changed."""
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == http_date(statobj.st_mtime):
+        return True
+    etag = media_etag(request, path)
+    return etag is not None and if_range == quote_etag(etag)
+
+
+@require_safe
+@condition(etag_func=media_etag, last_modified_func=media_last_modified)
+def serve_media(request, path: str):
+    """
+    Serve uploaded files in production.
+
+    Unchanged files are answered with 304 Not Modified and byte ranges with
+    206 Partial Content, so browsers can seek in videos. With
+    MEDIA_ACCEL_REDIRECT or MEDIA_X_SENDFILE set, sending the file is left
+    to the front proxy.
+    """
+    try:
+        fullpath = _get_media_path(path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found") from None
+    if not fullpath.is_file():
+        raise Http404("File not found")
+    content_type, encoding = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or "application/octet-stream"
+
+    if settings.MEDIA_ACCEL_REDIRECT or settings.MEDIA_X_SENDFILE:
+        response: HttpResponseBase = HttpResponse(content_type=content_type)
+        if settings.MEDIA_ACCEL_REDIRECT:
+            media_root = os.path.abspath(settings.MEDIA_ROOT)
+            relative_path = fullpath.relative_to(media_root).as_posix()
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT + quote(
+                relative_path
+            )
+        else:
+            response["X-Sendfile"] = str(fullpath)
+        return response
+
+    statobj = fullpath.stat()
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and _range_is_current(request, path, statobj):
+        try:
+            byte_range = parse_byte_range(range_header, statobj.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{statobj.st_size}"
+            return response
+
+    file = fullpath.open("rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        first, last = byte_range
+        file.seek(first)
+        response = FileResponse(
+            FileRange(file, last - first + 1), content_type=content_type, status=206
+        )
+        response["Content-Length"] = last - first + 1
+        response["Content-Range"] = f"bytes {first}-{last}/{statobj.st_size}"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -16,12 +16,19 @@ set -xe
 case "$SITE_INIT_MODE" in
   migrate)
     python manage.py migrate --noinput
+    # Apply changes of the search configuration and search_fields, the old
+    # index entries are replaced while the site is already being served
+    nice python manage.py reindex_search &
     ;;
   restore)
     psql -h ${WAGTAIL_DB_HOST} -U wagtail -d beobgrp_site -c "DROP SCHEMA public CASCADE; CREATE SCHEMA public;" &&
     python manage.py dbrestore --noinput --pg-options="--if-exists" &&
     python manage.py mediarestore --noinput &&
     python manage.py migrate --noinput
+    # Index the restored pages and render their images while the site is
+    # already being served, images missing a rendition are rendered on their
+    # first view until then
+    { nice python manage.py reindex_search || true; nice python manage.py backfill_renditions; } &
     ;;
   none)
     ;;
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class HomeConfig(AppConfig):
+    name = "home"
+
+    def ready(self):
+        # Connect the signal handlers that keep cached page fragments up to date
+        from home import signals  # noqa: F401
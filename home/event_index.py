@@ -0,0 +1,97 @@
+"""
+In-process index of the upcoming events listed by EventListBlock.
+
+Event pages often show several event lists, e.g. talks and observing evenings
+side by side in a multi-column layout. The upcoming events below a page are
+loaded with a single query, kept in memory for a few minutes and filtered by
+event type in Python, so all lists of a page share them.
+
+Entries are tied to the site-wide generation of the page cache, which changes
+whenever an event is published, unpublished, moved or deleted. The generation
+is kept in the default cache, so worker processes only notice changes made in
+another process if that cache is shared between them (DJANGO_CACHE_BACKEND set
+to "file" or "redis"). With the default per-process "locmem" cache, the other
+processes keep their entries until they expire.
+"""
+
+from __future__ import annotations
+
+import copy
+from collections.abc import Iterable
+from dataclasses import dataclass
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from django.utils.timezone import now
+
+from home.page_cache import get_generation
+from home.renditions import prefetch_renditions
+
+if TYPE_CHECKING:
+    from wagtail.models import Page
+
+    from home.models.events import SingleEvent
+
+# Seconds an entry is kept before the events are loaded again
+UPCOMING_EVENTS_TTL = 5 * 60
+
+
+@dataclass(frozen=True)
+class _IndexEntry:
+    generation: str
+    loaded_at: float
+    events: list[SingleEvent]
+
+
+_index: dict[int, _IndexEntry] = {}
+
+
+def _load_upcoming_events(parent_page: Page) -> list[SingleEvent]:
+    from home.models.events import SingleEvent
+
+    return list(
+        SingleEvent.objects.child_of(parent_page)
+        .live()
+        .filter(start_time__gte=now())
+        .select_related("image")
+        .prefetch_related(prefetch_renditions("image", "event"))
+        .order_by("start_time")
+    )
+
+
+def get_upcoming_events(
+    parent_page: Page, event_types: Iterable[str] | None = None
+) -> list[SingleEvent]:
+    """
+    Return the live events below parent_page that have not started yet,
+    soonest first, optionally only those of the given types.
+    """
+    generation = get_generation()
+    entry = _index.get(parent_page.pk)
+    if (
+        entry is None
+        or entry.generation != generation
+        or monotonic() - entry.loaded_at > UPCOMING_EVENTS_TTL
+    ):
+        entry = _IndexEntry(
+            generation=generation,
+            loaded_at=monotonic(),
+            events=_load_upcoming_events(parent_page),
+        )
+        _index[parent_page.pk] = entry
+
+    event_types = set(event_types or ())
+    current_time = now()
+    # Copies keep the attributes cached while rendering from being shared
+    # with later requests
+    return [
+        copy.copy(event)
+        for event in entry.events
+        if event.start_time >= current_time
+        and (not event_types or event.event_type in event_types)
+    ]
+
+
+def clear_event_index() -> None:
+    """Drop all entries, e.g. after the database was reset between tests."""
+    _index.clear()
@@ -0,0 +1,168 @@
+"""
+iCalendar feed of the events, for calendar subscriptions.
+
+Calendar clients poll the feed every few minutes, so the rendered document is
+cached per filter and only rebuilt after an event was published, unpublished,
+moved or deleted, which changes the site-wide generation of the page cache.
+The VEVENT of each event is cached as well, keyed by the time it was last
+published, so a rebuild only renders the events that changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.timezone import now
+
+from home.page_cache import get_generation
+
+if TYPE_CHECKING:
+    from home.models.events import SingleEvent
+
+FEED_CACHE_KEY = "home:ical:feed:{generation}:{filter_hash}"
+EVENT_CACHE_KEY = "home:ical:event:{event_id}:{published}"
+# Past events stay in the feed for a while, then drop out on the next rebuild
+FEED_PAST_EVENTS = timedelta(days=90)
+FEED_CACHE_TIMEOUT = 60 * 60
+# Events have no end time, calendars show them as two hours long
+EVENT_DURATION = timedelta(hours=2)
+
+
+def _escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold_line(line: str) -> str:
+    """Fold a content line into lines of at most 75 octets (RFC 5545 3.1)."""
+    parts: list[str] = []
+    current = b""
+    for char in line:
+        encoded = char.encode("utf-8")
+        # Continuation lines start with a space, which counts towards the limit
+        if len(current) + len(encoded) > (75 if not parts else 74):
+            parts.append(current.decode("utf-8"))
+            current = b""
+        current += encoded
+    parts.append(current.decode("utf-8"))
+    return "\r\n ".join(parts)
+
+
+def _format_datetime(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _render_event(event: SingleEvent) -> str:
+    from home.models.events import _get_rich_text_plain_text
+
+    summary = f"{event.event_type}: {event.event_title}"
+    if not event.event_title:
+        summary = event.event_type
+    if event.booked_out and not event.cancelled:
+        summary += " (ausgebucht)"
+    description = "\n\n".join(
+        part
+        for part in (event.referent, _get_rich_text_plain_text(event.abstract))
+        if part
+    )
+    base_url = settings.WAGTAILADMIN_BASE_URL
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.web_id}@{urlparse(base_url).hostname}",
+        f"DTSTAMP:{_format_datetime(event.last_published_at or now())}",
+        f"DTSTART:{_format_datetime(event.start_time)}",
+        f"DTEND:{_format_datetime(event.start_time + EVENT_DURATION)}",
+        f"SUMMARY:{_escape_text(summary)}",
+        f"STATUS:{'CANCELLED' if event.cancelled else 'CONFIRMED'}",
+        f"URL:{base_url}{reverse('event_redirect', args=[event.web_id])}",
+    ]
+    if event.location:
+        lines.append(f"LOCATION:{_escape_text(event.location)}")
+    if description:
+        lines.append(f"DESCRIPTION:{_escape_text(description)}")
+    lines.append("END:VEVENT")
+    return "".join(_fold_line(line) + "\r\n" for line in lines)
+
+
+def _get_event_cache_key(event: SingleEvent) -> str:
+    published = event.last_published_at.timestamp() if event.last_published_at else ""
+    return EVENT_CACHE_KEY.format(event_id=event.pk, published=published)
+
+
+def update_event(event: SingleEvent) -> None:
+    """Render the VEVENT of a published event ahead of the next feed rebuild."""
+    cache.set(_get_event_cache_key(event), _render_event(event), timeout=None)
+
+
+def _render_feed(parent_id: int | None, event_types: list[str]) -> str:
+    from home.models.events import EventPage, SingleEvent
+
+    parent = None
+    events = SingleEvent.objects.live().public()
+    if parent_id is not None:
+        parent = EventPage.objects.live().public().get(pk=parent_id)
+        events = events.child_of(parent)
+    if event_types:
+        events = events.filter(event_type__in=event_types)
+    events = list(
+        events.filter(start_time__gte=now() - FEED_PAST_EVENTS).order_by("start_time")
+    )
+
+    cache_keys = {event.pk: _get_event_cache_key(event) for event in events}
+    components = cache.get_many(cache_keys.values())
+    rendered = {
+        cache_keys[event.pk]: _render_event(event)
+        for event in events
+        if cache_keys[event.pk] not in components
+    }
+    if rendered:
+        cache.set_many(rendered, timeout=None)
+    components.update(rendered)
+
+    name = parent.title if parent is not None else "Beobachtergruppe"
+    header = "".join(
+        _fold_line(line) + "\r\n"
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//Beobachtergruppe//Veranstaltungen//DE",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_escape_text(name)}",
+        )
+    )
+    body = "".join(components[cache_keys[event.pk]] for event in events)
+    return f"{header}{body}END:VCALENDAR\r\n"
+
+
+def get_feed(parent_id: int | None = None, event_types: Iterable[str] = ()) -> str:
+    """
+    Return the iCalendar document of the live events below the EventPage
+    with the given ID (or of all events), optionally only those of the given
+    types. Raises EventPage.DoesNotExist for unknown pages.
+    """
+    event_types = sorted(set(event_types))
+    filter_key = "{}:{}".format(parent_id or "", ",".join(event_types))
+    cache_key = FEED_CACHE_KEY.format(
+        generation=get_generation(),
+        filter_hash=hashlib.md5(
+            filter_key.encode("utf-8"), usedforsecurity=False
+        ).hexdigest(),
+    )
+    feed = cache.get(cache_key)
+    if feed is None:
+        feed = _render_feed(parent_id, event_types)
+        cache.set(cache_key, feed, timeout=FEED_CACHE_TIMEOUT)
+    return feed
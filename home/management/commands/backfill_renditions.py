@@ -0,0 +1,174 @@
+import os
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from wagtail.blocks import ListBlock, StreamBlock, StructBlock
+from wagtail.fields import StreamField
+from wagtail.images import get_image_model
+from wagtail.images.blocks import ImageChooserBlock
+from wagtail.images.models import SourceImageIOError
+from wagtail.models import Page
+
+from home.management.parallel import run_in_processes
+from home.models.common import ImageWithCaptionBlock, SidebarPromotionMixin
+from home.renditions import PAGE_IMAGE_PRESETS, UPLOAD_PRESETS, get_filter_specs
+from home.sidebar import SIDEBAR_ICON_FILTER
+
+
+def _get_child_values(block, value):
+    """Yield the child blocks of a structural block with their values."""
+    if isinstance(block, StreamBlock):
+        for child in value:
+            yield child.block, child.value
+    elif isinstance(block, StructBlock):
+        for name, child_block in block.child_blocks.items():
+            yield child_block, value.get(name)
+    elif isinstance(block, ListBlock):
+        for item in value:
+            yield block.child_block, item
+
+
+def _get_block_images(block, value):
+    """Yield the images in a StreamField value with the presets they are shown in."""
+    if value is None:
+        return
+    if isinstance(block, ImageWithCaptionBlock):
+        side_caption = value["caption_position"] in ("left", "right")
+        yield value["image"], ("caption" if side_caption else "content",)
+    elif isinstance(block, ImageChooserBlock):
+        yield value, ()
+    else:
+        for child_block, child_value in _get_child_values(block, value):
+            yield from _get_block_images(child_block, child_value)
+
+
+def warm_image(image_id: int, filter_specs: list[str]) -> int | str:
+    """
+    Create the missing renditions of an image and return how many were created,
+    or why they could not be created, e.g. because the original image file is
+    missing or corrupt. Renditions whose file is missing, e.g. after restoring
+    the database without the matching media files, are created again.
+    """
+    image = get_image_model().objects.filter(pk=image_id).first()
+    if image is None:
+        return 0
+    renditions = list(image.renditions.filter(filter_spec__in=filter_specs))
+    missing_files = [
+        rendition.pk
+        for rendition in renditions
+        if not rendition.file.storage.exists(rendition.file.name)
+    ]
+    if missing_files:
+        image.renditions.filter(pk__in=missing_files).delete()
+    try:
+        image.get_renditions(*filter_specs)
+    except SourceImageIOError:
+        return "file missing"
+    except Exception as error:
+        # A single unreadable original must not stop the other images
+        return f"cannot be rendered ({type(error).__name__}: {error})"
+    return len(filter_specs) - len(renditions) + len(missing_files)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the missing renditions of all images in the image library and "
+        "of the images shown on pages. Existing renditions are kept, so an "
+        "interrupted run can simply be started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (default: number of CPU cores)",
+        )
+
+    def handle(self, *args, **options):
+        filter_specs = self.collect_filter_specs()
+        total = len(filter_specs)
+        self.stdout.write(f"Rendering {total} images")
+
+        created = 0
+        for done, (image_id, count) in enumerate(
+            self.warm_images(filter_specs, options["processes"]), 1
+        ):
+            if isinstance(count, str):
+                self.stderr.write(f"[{done}/{total}] Image {image_id}: {count}")
+                continue
+            created += count
+            if count:
+                self.stdout.write(f"[{done}/{total}] Image {image_id}: {count} created")
+            elif done % 100 == 0 or done == total:
+                self.stdout.write(f"[{done}/{total}]")
+        self.stdout.write(self.style.SUCCESS(f"{created} renditions created"))
+
+    def warm_images(self, filter_specs, processes):
+        return run_in_processes(
+            warm_image,
+            ((image_id, (image_id, specs)) for image_id, specs in filter_specs.items()),
+            processes,
+        )
+
+    def collect_filter_specs(self) -> dict[int, list[str]]:
+        """Return the filter specs to render for each image, ordered by image ID."""
+        images = get_image_model().objects.only("pk", "file").in_bulk()
+        preset_names: defaultdict[int, set[str]] = defaultdict(set)
+        filter_specs: defaultdict[int, set[str]] = defaultdict(set)
+        for image_id in images:
+            preset_names[image_id].update(UPLOAD_PRESETS)
+        self.collect_field_images(preset_names)
+        for model in apps.get_app_config("home").get_models():
+            if issubclass(model, Page):
+                self.collect_page_images(model, preset_names, filter_specs)
+
+        for image_id, names in preset_names.items():
+            if image_id in images:
+                filter_specs[image_id].update(
+                    get_filter_specs(images[image_id], sorted(names))
+                )
+        return {
+            image_id: sorted(filter_specs[image_id])
+            for image_id in sorted(filter_specs)
+            if image_id in images
+        }
+
+    def collect_field_images(self, preset_names):
+        """Add the presets of the images chosen in the image fields of pages."""
+        for label, fields in PAGE_IMAGE_PRESETS.items():
+            model = apps.get_model(label)
+            for field_name, field_presets in fields.items():
+                for image_id in (
+                    model.objects.live()
+                    .filter(**{f"{field_name}__isnull": False})
+                    .values_list(f"{field_name}_id", flat=True)
+                ):
+                    preset_names[image_id].update(field_presets)
+
+    def collect_page_images(self, model, preset_names, filter_specs):
+        """Add the sidebar icons and the StreamField images of a page type."""
+        if issubclass(model, SidebarPromotionMixin):
+            for image_id in (
+                model.objects.live()
+                .filter(sidebar_icon__isnull=False)
+                .values_list("sidebar_icon_id", flat=True)
+            ):
+                filter_specs[image_id].add(SIDEBAR_ICON_FILTER)
+
+        for field in model._meta.local_fields:
+            if not isinstance(field, StreamField):
+                continue
+            for value in (
+                model.objects.live().values_list(field.name, flat=True).iterator()
+            ):
+                for image, block_presets in _get_block_images(
+                    field.stream_block, value
+                ):
+                    if image is None:
+                        continue
+                    preset_names[image.pk].update(block_presets)
+                    if not block_presets:
+                        # ImageChooserBlock renders the original image
+                        filter_specs[image.pk].add("original")
@@ -0,0 +1,93 @@
+import os
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from modelsearch.management.commands.rebuild_modelsearch_index import (
+    group_models_by_index,
+)
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import get_indexed_models
+
+from home.management.parallel import run_in_processes
+from search.result_cache import invalidate_search_results
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+def index_chunk(model_label: str, pks: list) -> int:
+    """Index the objects of a model with the given primary keys, return how many."""
+    model = apps.get_model(model_label)
+    index = get_search_backend().get_index_for_model(model)
+    objects = list(model.get_indexed_objects().filter(pk__in=pks))
+    index.add_items(model, objects)
+    return len(objects)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search index of all pages and other indexed objects in "
+        "parallel. Objects are indexed in chunks, so large StreamField bodies "
+        "are spread over all worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (default: number of CPU cores)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Objects indexed per task (default: {DEFAULT_CHUNK_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        for index, models in group_models_by_index(
+            backend, get_indexed_models()
+        ).items():
+            # Deletes entries of objects that no longer exist, the others are
+            # replaced chunk by chunk, so searching keeps working meanwhile
+            rebuilder = backend.rebuilder_class(index)
+            index = rebuilder.start()
+            for model in models:
+                index.add_model(model)
+
+            chunks = self.collect_chunks(models, options["chunk_size"])
+            total = sum(len(pks) for _, pks in chunks)
+            self.stdout.write(f"Indexing {total} objects in {len(chunks)} chunks")
+            indexed = 0
+            for done, (model_label, count) in enumerate(
+                self.index_chunks(chunks, options["processes"]), 1
+            ):
+                indexed += count
+                self.stdout.write(
+                    f"[{done}/{len(chunks)}] {model_label}: {count} indexed, "
+                    f"{indexed}/{total} in total"
+                )
+            rebuilder.finish()
+        invalidate_search_results()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
+
+    def collect_chunks(self, models, chunk_size) -> list[tuple[str, list]]:
+        """Return the primary keys to index, split into chunks per model."""
+        chunks = []
+        for model in models:
+            pks = list(
+                model.get_indexed_objects().order_by("pk").values_list("pk", flat=True)
+            )
+            chunks += [
+                (model._meta.label, pks[start : start + chunk_size])
+                for start in range(0, len(pks), chunk_size)
+            ]
+        return chunks
+
+    def index_chunks(self, chunks, processes):
+        return run_in_processes(
+            index_chunk,
+            ((model_label, (model_label, pks)) for model_label, pks in chunks),
+            processes,
+        )
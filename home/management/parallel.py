@@ -0,0 +1,44 @@
+"""
+Running the work of a management command in parallel worker processes.
+"""
+
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Any
+
+import django
+from django.db import connections
+
+
+def run_in_processes(
+    function: Callable[..., Any],
+    jobs: Iterable[tuple[Hashable, tuple]],
+    processes: int,
+) -> Iterator[tuple[Hashable, Any]]:
+    """
+    Call a module-level function with the arguments of each (key, args) job
+    and yield (key, result) as the calls finish. With one process, the calls
+    run in this process in the given order. The other calls are cancelled if
+    one of them raises.
+    """
+    if processes <= 1:
+        for key, args in jobs:
+            yield key, function(*args)
+        return
+
+    # Worker processes open their own database connections
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=get_context("spawn"),
+        # Set up Django before the jobs, which import models, are unpickled
+        initializer=django.setup,
+    ) as executor:
+        futures = {executor.submit(function, *args): key for key, args in jobs}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        except BaseException:
+            executor.shutdown(cancel_futures=True)
+            raise
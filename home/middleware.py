@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+
+from home.page_cache import get_cached_response, get_page_etag, store_response
+
+
+class PageCacheMiddleware:
+    """
+    Serve Wagtail pages to anonymous visitors from the page cache.
+
+    Only pages marked by the on_serve_page hook in home.wagtail_hooks are
+    stored, so admin, search and media responses always pass through.
+    Cached pages carry an ETag, so revalidation requests are answered with
+    304 Not Modified.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._is_cacheable_request(request):
+            return self.get_response(request)
+
+        response = get_cached_response(request)
+        if response is not None:
+            response["X-Page-Cache"] = "hit"
+            return get_conditional_response(
+                request, etag=response.get("ETag"), response=response
+            )
+
+        response = self.get_response(request)
+
+        page_id = getattr(request, "page_cache_page_id", None)
+        if page_id is not None and self._is_cacheable_response(response):
+            response["ETag"] = get_page_etag(request, page_id)
+            store_response(request, page_id, response)
+            response["X-Page-Cache"] = "miss"
+            return get_conditional_response(
+                request, etag=response["ETag"], response=response
+            )
+        return response
+
+    def _is_cacheable_request(self, request) -> bool:
+        return (
+            settings.PAGE_CACHE_ENABLED
+            and request.method in ("GET", "HEAD")
+            and not request.user.is_authenticated
+        )
+
+    def _is_cacheable_response(self, response) -> bool:
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and "private" not in response.get("Cache-Control", "")
+        )
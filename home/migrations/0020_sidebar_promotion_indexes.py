@@ -0,0 +1,44 @@
+# Generated by Django 6.0.5 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("home", "0019_alter_singleevent_abstract_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="eventpage",
+            index=models.Index(
+                condition=models.Q(("show_in_sidebar", True)),
+                fields=["show_in_sidebar"],
+                name="home_eventpage_promo",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="galleryindexpage",
+            index=models.Index(
+                condition=models.Q(("show_in_sidebar", True)),
+                fields=["show_in_sidebar"],
+                name="home_galleryindexpage_promo",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="gallerypage",
+            index=models.Index(
+                condition=models.Q(("show_in_sidebar", True)),
+                fields=["show_in_sidebar"],
+                name="home_gallerypage_promo",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="homepage",
+            index=models.Index(
+                condition=models.Q(("show_in_sidebar", True)),
+                fields=["show_in_sidebar"],
+                name="home_homepage_promo",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.5 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("home", "0020_sidebar_promotion_indexes"),
+        ("wagtailcore", "0097_baselogentry_uuid_action_timestamp_indexes"),
+        ("wagtailimages", "0027_image_description"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="singleevent",
+            index=models.Index(
+                fields=["start_time", "event_type"], name="home_singleevent_upcoming"
+            ),
+        ),
+    ]
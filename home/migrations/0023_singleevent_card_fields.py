@@ -0,0 +1,122 @@
+# Generated by Django 6.0.5 on 2026-10-18 12:25
+
+import hashlib
+import textwrap
+import urllib.parse
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils.timezone import localtime
+
+# Copies of the functions in home.models.events at the time of this migration,
+# so later changes to them do not change what it stores
+
+
+def get_web_id(title):
+    return hashlib.sha256(title.encode("utf-8")).hexdigest()[:8]
+
+
+def get_first_reservation_date(start_time):
+    return localtime(start_time).date() - timedelta(weeks=4)
+
+
+def get_reservation_mailto_link(event):
+    default_title = (
+        "Beobachtungsabend" if event.event_type == "Beobachtungsabend" else ""
+    )
+    has_custom_title = event.event_title and event.event_title != default_title
+
+    if has_custom_title:
+        referent_line = (
+            f"  {event.referent}\n"
+            if event.referent
+            and event.event_type in ["Vortrag", "Hybride Vortrag", "Online Vortrag"]
+            else ""
+        )
+        location_line = (
+            f"  Ort: {event.location}\n"
+            if event.location
+            and event.event_type
+            in ["Vortrag", "Hybride Vortrag", "Beobachtungsabend", "Ausflug"]
+            else ""
+        )
+        body = textwrap.dedent(f"""
+                Liebe Beobachtergruppe,
+
+                bitte um Anmeldung zum folgenden {event.event_type}:
+
+                  {event.event_title}
+                {referent_line}{location_line}
+                am {event.start_time:%A, den %d.%m.%y} um {event.start_time:%H:%M} Uhr
+
+                Name, Vorname: ...
+                Anzahl Personen: ...
+
+                Mit freundlichen Grüßen
+                ...
+            """).strip()
+    else:
+        location_str = f"im {event.location}" if event.location else ""
+        request_line = (
+            f"bitte um Anmeldung zum {event.event_type} {location_str} "
+            f"am {event.start_time:%A, den %d.%m.%y} um {event.start_time:%H:%M} Uhr."
+        )
+        body = textwrap.dedent(f"""
+                Liebe Beobachtergruppe,
+
+                {request_line}
+
+                Name, Vorname: ...
+                Anzahl Personen: ...
+
+                Mit freundlichen Grüßen
+                ...
+            """).strip()
+
+    subject_prefix = f"{event.event_type} am {event.start_time:%d.%m.%y}"
+    subject = (
+        f"Anmeldung für {subject_prefix} ({event.event_title})"
+        if has_custom_title
+        else f"Anmeldung für {subject_prefix}"
+    )
+    return (
+        f"mailto:{urllib.parse.quote('reservierung@beobachtergruppe.de')}"
+        f"?subject={urllib.parse.quote(subject)}&body={urllib.parse.quote(body)}"
+    )
+
+
+def fill_card_fields(apps, schema_editor):
+    SingleEvent = apps.get_model("home", "SingleEvent")
+    events = list(SingleEvent.objects.all())
+    for event in events:
+        event.web_id = get_web_id(event.title)
+        event.reservation_date = get_first_reservation_date(event.start_time)
+        event.reservation_mailto_link = get_reservation_mailto_link(event)
+    SingleEvent.objects.bulk_update(
+        events, ["web_id", "reservation_date", "reservation_mailto_link"]
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("home", "0022_singleevent_upcoming_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="singleevent",
+            name="reservation_date",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="singleevent",
+            name="reservation_mailto_link",
+            field=models.TextField(default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="singleevent",
+            name="web_id",
+            field=models.CharField(default="", editable=False, max_length=8),
+        ),
+        migrations.RunPython(fill_card_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.5 on 2026-10-18 13:05
+
+import secrets
+
+from django.db import migrations, models
+
+
+def make_web_ids_unique(apps, schema_editor):
+    SingleEvent = apps.get_model("home", "SingleEvent")
+    # Events with the same title got the same ID, the oldest keeps it
+    seen = set()
+    for event in SingleEvent.objects.order_by("pk"):
+        if event.web_id in seen:
+            event.web_id = secrets.token_hex(4)
+            while event.web_id in seen:
+                event.web_id = secrets.token_hex(4)
+            event.save(update_fields=["web_id"])
+        seen.add(event.web_id)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("home", "0023_singleevent_card_fields"),
+    ]
+
+    operations = [
+        migrations.RunPython(make_web_ids_unique, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="singleevent",
+            name="web_id",
+            field=models.CharField(
+                default="", editable=False, max_length=8, unique=True
+            ),
+        ),
+    ]
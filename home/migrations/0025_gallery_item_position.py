@@ -0,0 +1,82 @@
+# Generated by Django 6.0.5 on 2026-10-18 18:19
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copy of home.models.gallery.get_gallery_sort_key at the time of this
+# migration, so later changes to it do not change what it stores
+
+
+def get_gallery_sort_key(item_date, pk):
+    return (date.max - item_date).days * 10**10 + pk
+
+
+def fill_gallery_positions(apps, schema_editor):
+    Page = apps.get_model("wagtailcore", "Page")
+    GalleryItemPosition = apps.get_model("home", "GalleryItemPosition")
+    items = [
+        item
+        for model_name in ("PhotoPage", "VideoPage")
+        for item in apps.get_model("home", model_name)
+        .objects.filter(live=True)
+        .only("pk", "path", "date")
+    ]
+    # Pages of the tree use 4 characters of the path per level
+    parent_ids = dict(
+        Page.objects.filter(path__in={item.path[:-4] for item in items}).values_list(
+            "path", "pk"
+        )
+    )
+    GalleryItemPosition.objects.bulk_create(
+        GalleryItemPosition(
+            page_id=item.pk,
+            gallery_id=parent_ids[item.path[:-4]],
+            sort_key=get_gallery_sort_key(item.date, item.pk),
+        )
+        for item in items
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("home", "0024_singleevent_unique_web_id"),
+        ("wagtailcore", "0097_baselogentry_uuid_action_timestamp_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GalleryItemPosition",
+            fields=[
+                (
+                    "page",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="gallery_position",
+                        serialize=False,
+                        to="wagtailcore.page",
+                    ),
+                ),
+                ("sort_key", models.BigIntegerField()),
+                (
+                    "gallery",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="wagtailcore.page",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["gallery", "sort_key"],
+                        name="home_gallery_item_position",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_gallery_positions, migrations.RunPython.noop),
+    ]
@@ -12,6 +12,9 @@ from wagtail.blocks import PageChooserBlock
 from django.utils.text import slugify
 from django.db import models
 from wagtail.admin.panels.field_panel import FieldPanel
+from wagtail.models import Site
+
+from home.page_cache import limit_cache_validity
 
 if TYPE_CHECKING:
     from django.http import HttpRequest
@@ -368,42 +371,17 @@ class CommonContextMixin:
     This mixin should be used with Wagtail Page classes.
     """
 
-    def _get_upcoming_events(self):
-        from home.models.events import SingleEvent
-        from django.utils.timezone import now
+    def _get_upcoming_events(self, request: "HttpRequest"):
+        """Get the next events, with the URLs of their event pages resolved."""
+        from home.sidebar import get_upcoming_events
 
-        return (
-            SingleEvent.objects.live()  # type: ignore[attr-defined]
-            .public()
-            .filter(start_time__gte=now())  # Match events at or after the current time
-            .order_by("start_time")[:2]
-        )
+        return get_upcoming_events(Site.find_for_request(request))
 
-    def _get_sidebar_pages(self):
+    def _get_sidebar_pages(self, request: "HttpRequest"):
         """Get all pages that should be promoted in the sidebar."""
-        from home.models import (
-            HomePage,
-            EventPage,
-            GalleryIndexPage,
-            GalleryPage,
-        )
+        from home.sidebar import get_sidebar_links
 
-        # Collect all pages from all models that have show_in_sidebar=True
-        pages = (
-            list(HomePage.objects.live().public().filter(show_in_sidebar=True))
-            + list(EventPage.objects.live().public().filter(show_in_sidebar=True))
-            + list(
-                GalleryIndexPage.objects.live().public().filter(show_in_sidebar=True)
-            )
-            + list(GalleryPage.objects.live().public().filter(show_in_sidebar=True))
-        )
-
-        # Sort by latest revision (most recently modified first)
-        pages.sort(
-            key=lambda p: p.latest_revision_created_at or p.first_published_at,
-            reverse=True,
-        )
-        return pages
+        return get_sidebar_links(Site.find_for_request(request))
 
     def get_anchors(self) -> list[tuple[str, str]]:
         """
@@ -425,8 +403,12 @@ class CommonContextMixin:
 
     def get_context(self, request: "HttpRequest", *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)  # type: ignore[misc]
-        context["upcoming_events"] = self._get_upcoming_events()
-        context["sidebar_pages"] = self._get_sidebar_pages()
+        upcoming_events = self._get_upcoming_events(request)
+        if upcoming_events:
+            # The sidebar changes as soon as the first listed event has started
+            limit_cache_validity(request, upcoming_events[0].start_time)
+        context["upcoming_events"] = upcoming_events
+        context["sidebar_pages"] = self._get_sidebar_pages(request)
         return context
 
 
@@ -485,3 +467,11 @@ class SidebarPromotionMixin(models.Model):
 
     class Meta:
         abstract = True
+        indexes = [
+            # Partial index so the sidebar lookup only touches promoted pages
+            models.Index(
+                fields=["show_in_sidebar"],
+                condition=models.Q(show_in_sidebar=True),
+                name="%(app_label)s_%(class)s_promo",
+            ),
+        ]
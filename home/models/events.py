@@ -1,17 +1,25 @@
 from beobgrp_site.utils.email import create_email_link
 
-from django.db.models.fields import BooleanField, CharField, DateTimeField
+from django.db.models.fields import (
+    BooleanField,
+    CharField,
+    DateField,
+    DateTimeField,
+    TextField,
+)
 from django.db import models
 
 from django.utils.text import slugify
 from wagtail.admin.panels.field_panel import FieldPanel
 from wagtail.fields import RichTextField
 from wagtail.models import Page
+from wagtail.search import index
 
 
 import hashlib
+import secrets
 import textwrap
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta
 from functools import cached_property
 from html import unescape
 
@@ -34,6 +42,8 @@ from home.models.common import (
     gen_body_content,
     create_multi_column_block,
 )
+from home.event_index import get_upcoming_events
+from home.page_cache import limit_cache_validity
 
 logger = logging.getLogger(__name__)
 
@@ -197,15 +207,116 @@ def _get_page_title(start_time, event_title):
     if not event_title:
         raise ValueError("event_title is required to generate page title")
 
+    formatted_start_time = localtime(_as_aware_datetime(start_time)).strftime(
+        "%Y-%m-%d %H:%M"
+    )
+    return f"{formatted_start_time} - {event_title}"
+
+
+def _as_aware_datetime(start_time) -> datetime:
     if isinstance(start_time, str):
         start_time = parse_datetime(start_time)
         if start_time is None:
             raise ValueError("Cannot parse start_time string")
     if is_naive(start_time):
         start_time = make_aware(start_time)
+    return start_time
 
-    formatted_start_time = localtime(start_time).strftime("%Y-%m-%d %H:%M")
-    return f"{formatted_start_time} - {event_title}"
+
+def _get_web_id(title: str) -> str:
+    """Return the initial ID of an event, derived from its page title."""
+    hash_code = hashlib.sha256(title.encode("utf-8")).hexdigest()
+    return hash_code[:8]
+
+
+def _get_first_reservation_date(start_time) -> date:
+    """Events can be reserved 4 weeks in advance."""
+    return localtime(_as_aware_datetime(start_time)).date() - timedelta(weeks=4)
+
+
+def _get_reservation_mailto_link(event) -> str:
+    """Build the mailto link of the reservation button of an event card."""
+    # Build body based on whether event has a real title or just the default
+    # Use detailed format only for events with custom titles (not auto-assigned defaults)
+    has_custom_title = (
+        event.event_title
+        and event.event_title != _get_default_event_title(event.event_type)
+    )
+
+    if has_custom_title:
+        # Detailed format for events with titles (Vortrag, Ausflug, etc.)
+        referent_line = (
+            f"  {event.referent}\n"
+            if event.referent
+            and event.event_type
+            in [
+                EventTypes.TALK,
+                EventTypes.HYBRID,
+                EventTypes.ONLINE,
+            ]
+            else ""
+        )
+
+        location_line = (
+            f"  Ort: {event.location}\n"
+            if event.location
+            and event.event_type
+            in [
+                EventTypes.TALK,
+                EventTypes.HYBRID,
+                EventTypes.OBSERVE,
+                EventTypes.EXCURSION,
+            ]
+            else ""
+        )
+
+        body = textwrap.dedent(f"""
+                Liebe Beobachtergruppe,
+                
+                bitte um Anmeldung zum folgenden {event.event_type}:
+                
+                  {event.event_title}
+                {referent_line}{location_line}
+                am {event.start_time:%A, den %d.%m.%y} um {event.start_time:%H:%M} Uhr
+                
+                Name, Vorname: ...
+                Anzahl Personen: ...
+                
+                Mit freundlichen Grüßen
+                ...
+            """).strip()
+    else:
+        # Simple inline format for events without custom titles (e.g., Beobachtungsabend)
+        location_str = f"im {event.location}" if event.location else ""
+        request_line = (
+            f"bitte um Anmeldung zum {event.event_type} {location_str} "
+            f"am {event.start_time:%A, den %d.%m.%y} um {event.start_time:%H:%M} Uhr."
+        )
+        body = textwrap.dedent(f"""
+                Liebe Beobachtergruppe,
+                
+                {request_line}
+                
+                Name, Vorname: ...
+                Anzahl Personen: ...
+                
+                Mit freundlichen Grüßen
+                ...
+            """).strip()
+
+    # Build subject with event type
+    subject_prefix = f"{event.event_type} am {event.start_time:%d.%m.%y}"
+    subject = (
+        f"Anmeldung für {subject_prefix} ({event.event_title})"
+        if has_custom_title
+        else f"Anmeldung für {subject_prefix}"
+    )
+
+    return create_email_link(
+        email_address="reservierung@beobachtergruppe.de",
+        subject=subject,
+        body=body,
+    )
 
 
 def _get_default_event_title(event_type):
@@ -233,6 +344,25 @@ class SingleEvent(Page):
     booked_out: BooleanField = BooleanField(default=False)
     needs_reservation: BooleanField = BooleanField(default=True)
 
+    # Anchor of the event card and short link /e/<web_id>, assigned once when
+    # the event is created so links stay valid when the event is changed
+    web_id: CharField = CharField(max_length=8, unique=True, default="", editable=False)
+    # Derived from the fields above whenever the event is saved, so event
+    # lists render without building mail bodies
+    reservation_date: DateField = DateField(null=True, editable=False)
+    reservation_mailto_link: TextField = TextField(default="", editable=False)
+
+    exclude_fields_in_copy = ["web_id"]
+
+    # The page title already contains the event title, prefixed with the date
+    search_fields = Page.search_fields + [
+        index.SearchField("event_title", boost=2),
+        index.SearchField("referent", boost=1.5),
+        index.SearchField("abstract"),
+        index.FilterField("event_type"),
+        index.FilterField("start_time"),
+    ]
+
     content_panels = [
         FieldPanel("event_type", heading="Art der Veranstaltung"),
         FieldPanel("start_time", heading="Zeit"),
@@ -270,6 +400,7 @@ class SingleEvent(Page):
 
             self.title = _get_page_title(self.start_time, event_title)
             self.slug = slugify(self.title)
+            self.update_derived_fields()
         except ValueError as e:
             logger.error(f"Cannot clean SingleEvent: {e}")
             raise
@@ -285,21 +416,62 @@ class SingleEvent(Page):
 
             self.title = _get_page_title(self.start_time, event_title)
             self.slug = slugify(self.title)
+            self.update_derived_fields()
         except ValueError as e:
             logger.error(f"Cannot save SingleEvent: {e}")
             raise
+        if not self.web_id:
+            self.web_id = self._generate_web_id()
         super().save(*args, **kwargs)
 
-    @cached_property
-    def web_id(self) -> str:
-        hash_code = hashlib.sha256(str(self).encode("utf-8")).hexdigest()
-        return hash_code[:8]
+    def with_content_json(self, content):
+        page = super().with_content_json(content)
+        # Revisions from before the ID was assigned must not reset it
+        page.web_id = self.web_id
+        return page
 
-    @cached_property
+    def _generate_web_id(self) -> str:
+        """
+        Return a new ID for the event: the hash of its title, as used before IDs
+        were stored, or a random one if another event already has it.
+        """
+        web_id = _get_web_id(self.title)
+        while SingleEvent.objects.filter(web_id=web_id).exclude(pk=self.pk).exists():
+            web_id = secrets.token_hex(4)
+        return web_id
+
+    def update_derived_fields(self) -> None:
+        """Compute the stored fields shown on event cards from the event data."""
+        self.reservation_date = _get_first_reservation_date(self.start_time)
+        self.reservation_mailto_link = _get_reservation_mailto_link(self)
+
+    @property
     def first_reservation_date(self) -> date:
-        return localtime(self.start_time).date() - timedelta(weeks=4)
+        if self.reservation_date is None:
+            # Not saved yet
+            return _get_first_reservation_date(self.start_time)
+        return self.reservation_date
 
     @cached_property
+    def reservation_opens_at(self) -> datetime:
+        return make_aware(datetime.combine(self.first_reservation_date, time.min))
+
+    def get_valid_until(self) -> datetime:
+        """
+        Return the next point in time at which a rendered event card changes,
+        either because the reservation opens or because the event starts.
+        """
+        waits_for_reservation = (
+            self.needs_reservation
+            and not self.cancelled
+            and not self.booked_out
+            and now() < self.reservation_opens_at
+        )
+        if waits_for_reservation:
+            return self.reservation_opens_at
+        return self.start_time
+
+    @property
     def is_reservable(self) -> bool:
         """
         An event is reservable up to 4 weeks in advance if not cancelled or booked out
@@ -307,13 +479,13 @@ class SingleEvent(Page):
         is_open = not self.cancelled and not self.booked_out
         return date.today() >= self.first_reservation_date and is_open
 
-    @cached_property
+    @property
     def warning_class(self) -> str:
         if self.cancelled or self.booked_out:
             return "not-available"
         return ""
 
-    @cached_property
+    @property
     def status(self) -> str:
         if self.cancelled:
             return "abgesagt"
@@ -322,88 +494,17 @@ class SingleEvent(Page):
         else:
             return ""
 
-    @cached_property
-    def reservation_mailto_link(self) -> str:
-        # Build body based on whether event has a real title or just the default
-        # Use detailed format only for events with custom titles (not auto-assigned defaults)
-        has_custom_title = (
-            self.event_title
-            and self.event_title != _get_default_event_title(self.event_type)
-        )
-
-        if has_custom_title:
-            # Detailed format for events with titles (Vortrag, Ausflug, etc.)
-            referent_line = (
-                f"  {self.referent}\n"
-                if self.referent
-                and self.event_type
-                in [
-                    EventTypes.TALK,
-                    EventTypes.HYBRID,
-                    EventTypes.ONLINE,
-                ]
-                else ""
-            )
-
-            location_line = (
-                f"  Ort: {self.location}\n"
-                if self.location
-                and self.event_type
-                in [
-                    EventTypes.TALK,
-                    EventTypes.HYBRID,
-                    EventTypes.OBSERVE,
-                    EventTypes.EXCURSION,
-                ]
-                else ""
-            )
-
-            body = textwrap.dedent(f"""
-                Liebe Beobachtergruppe,
-                
-                bitte um Anmeldung zum folgenden {self.event_type}:
-                
-                  {self.event_title}
-                {referent_line}{location_line}
-                am {self.start_time:%A, den %d.%m.%y} um {self.start_time:%H:%M} Uhr
-                
-                Name, Vorname: ...
-                Anzahl Personen: ...
-                
-                Mit freundlichen Grüßen
-                ...
-            """).strip()
-        else:
-            # Simple inline format for events without custom titles (e.g., Beobachtungsabend)
-            location_str = f"im {self.location}" if self.location else ""
-            body = textwrap.dedent(f"""
-                Liebe Beobachtergruppe,
-                
-                bitte um Anmeldung zum {self.event_type} {location_str} am {self.start_time:%A, den %d.%m.%y} um {self.start_time:%H:%M} Uhr.
-                
-                Name, Vorname: ...
-                Anzahl Personen: ...
-                
-                Mit freundlichen Grüßen
-                ...
-            """).strip()
-
-        # Build subject with event type
-        subject_prefix = f"{self.event_type} am {self.start_time:%d.%m.%y}"
-        subject = (
-            f"Anmeldung für {subject_prefix} ({self.event_title})"
-            if has_custom_title
-            else f"Anmeldung für {subject_prefix}"
-        )
-
-        return create_email_link(
-            email_address="reservierung@beobachtergruppe.de",
-            subject=subject,
-            body=body,
-        )
-
     base_form_class = SingleEventForm
 
+    class Meta:
+        indexes = [
+            # Upcoming events, optionally of some types, see home.event_index
+            models.Index(
+                fields=["start_time", "event_type"],
+                name="home_singleevent_upcoming",
+            ),
+        ]
+
 
 class EventListBlock(StructBlock):
     event_type = MultipleChoiceBlock(
@@ -420,19 +521,16 @@ class EventListBlock(StructBlock):
             # Get the current page (parent page)
             parent_page = parent_context["page"]
 
-            # Query child pages of the parent that are of type SingleEvent
+            # Upcoming SingleEvent children of the parent, shared by all event lists
             event_types = value.get("event_type")
             if isinstance(event_types, str):
                 event_types = [event_types]
 
-            events_qs = (
-                SingleEvent.objects.child_of(parent_page)
-                .live()
-                .filter(start_time__gte=now())
-            )
-            if event_types:
-                events_qs = events_qs.filter(event_type__in=event_types)
-            events = events_qs.order_by("start_time")
+            events = get_upcoming_events(parent_page, event_types)
+
+            request = parent_context.get("request")
+            for event in events:
+                limit_cache_validity(request, event.get_valid_until())
 
             # Add events to the context
             context["events"] = events
@@ -459,6 +557,8 @@ class EventPage(CommonContextMixin, SidebarPromotionMixin, Page):
         default=[],
     )
 
+    search_fields = Page.search_fields + [index.SearchField("body")]
+
     content_panels = Page.content_panels + [FieldPanel("body", heading="Inhalt")]
     promote_panels = SidebarPromotionMixin.promote_panels
 
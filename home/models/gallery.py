@@ -1,11 +1,20 @@
+from datetime import date
+
 from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
 from django.db import models
 from django.db.models.fields import DateField, CharField, TimeField
+from django.db.models.functions import Coalesce
+from django.utils.cache import patch_vary_headers
+from wagtail.images import get_image_model
 from wagtail.models import Page
+from wagtail.query import PageQuerySet
+from wagtail.search import index
 from wagtail.admin.panels.field_panel import FieldPanel
 from wagtail.fields import RichTextField
 
 from home.models.common import CommonContextMixin, SidebarPromotionMixin
+from home.renditions import IMAGE_PRESETS, prefetch_renditions
 
 ALLOWED_MEDIA_EXTENSIONS = (".gif", ".mp4", ".webm", ".ogg", ".ogv")
 
@@ -20,7 +29,119 @@ def validate_media_file(file):
         )
 
 
-class PhotoPage(CommonContextMixin, Page):
+def _get_items(pages: PageQuerySet) -> PageQuerySet:
+    return (
+        pages.live()
+        .type(PhotoPage, VideoPage)
+        .annotate(item_date=Coalesce("photopage__date", "videopage__date"))
+        .order_by("-item_date", "pk")
+    )
+
+
+def get_gallery_items(gallery: Page) -> PageQuerySet:
+    """
+    Return the live photos and videos of a gallery in one query, newest first,
+    as generic pages annotated with their date as item_date.
+    """
+    return _get_items(Page.objects.child_of(gallery))
+
+
+def prefetch_thumbnails(items: list["PhotoPage | VideoPage"]) -> None:
+    """Load the thumbnails of specific gallery items and their card renditions."""
+    image_ids = {getattr(item, f"{item.thumbnail_field}_id") for item in items}
+    images = (
+        get_image_model()
+        .objects.prefetch_renditions(*IMAGE_PRESETS["card"].all_filter_specs)
+        .in_bulk(image_ids - {None})
+    )
+    for item in items:
+        image_id = getattr(item, f"{item.thumbnail_field}_id")
+        setattr(item, item.thumbnail_field, images.get(image_id))
+
+
+def get_gallery_sort_key(item_date: date, pk: int) -> int:
+    """
+    Return the position of an item in its gallery as one integer: newest
+    first, items of the same day by ID.
+    """
+    return (date.max - item_date).days * 10**10 + pk
+
+
+class GalleryItemPosition(models.Model):
+    """
+    Position of a live photo or video in its gallery. Photos and videos are
+    stored in two tables, this one orders them together, so the previous and
+    next item are found with the index on (gallery, sort_key). Kept up to date
+    by the signal handlers in home.signals.
+    """
+
+    page = models.OneToOneField(
+        Page,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="gallery_position",
+    )
+    gallery = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="+")
+    sort_key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["gallery", "sort_key"], name="home_gallery_item_position"
+            ),
+        ]
+
+
+class GalleryItemMixin:
+    """
+    Mixin for the photo and video pages of a gallery, linking to the previous
+    and next item of the gallery. Each of them is looked up with one indexed
+    query on the stored positions, the newest and the oldest item need a
+    second one to wrap around.
+    """
+
+    def _get_sort_key(self) -> int:
+        return get_gallery_sort_key(self.date, self.pk)  # type: ignore[attr-defined]
+
+    def update_gallery_position(self) -> None:
+        """Store the position of a live item in its gallery, drop that of others."""
+        pk, live = self.pk, self.live  # type: ignore[attr-defined]
+        if live:
+            GalleryItemPosition.objects.update_or_create(
+                page_id=pk,
+                defaults={
+                    "gallery_id": self.get_parent().pk,  # type: ignore[attr-defined]
+                    "sort_key": self._get_sort_key(),
+                },
+            )
+        else:
+            GalleryItemPosition.objects.filter(page_id=pk).delete()
+
+    def _get_adjacent_item(self, newer: bool) -> Page | None:
+        pk, path, steplen = self.pk, self.path, self.steplen  # type: ignore[attr-defined]
+        positions = GalleryItemPosition.objects.filter(
+            gallery__path=path[:-steplen]
+        ).select_related("page")
+        if newer:
+            adjacent = positions.filter(sort_key__lt=self._get_sort_key())
+            ordering = "-sort_key"
+        else:
+            adjacent = positions.filter(sort_key__gt=self._get_sort_key())
+            ordering = "sort_key"
+        position = adjacent.order_by(ordering).first()
+        if position is None:
+            # The newest item wraps around to the oldest one and vice versa
+            position = positions.exclude(page_id=pk).order_by(ordering).first()
+        return position.page if position is not None else None
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)  # type: ignore[misc]
+        context["previous"] = self._get_adjacent_item(newer=True)
+        context["next"] = self._get_adjacent_item(newer=False)
+        return context
+
+
+class PhotoPage(GalleryItemMixin, CommonContextMixin, Page):
     """
     A gallery page for displaying static photos.
     """
@@ -41,6 +162,13 @@ class PhotoPage(CommonContextMixin, Page):
     time: TimeField = TimeField(blank=True, null=True)
     location: CharField = CharField(max_length=255, default="", blank=True)
 
+    search_fields = Page.search_fields + [
+        index.SearchField("description"),
+        index.SearchField("author", boost=1.5),
+        index.SearchField("location"),
+        index.FilterField("date"),
+    ]
+
     content_panels = Page.content_panels + [
         FieldPanel("photo", heading="Foto"),
         FieldPanel("description", heading="Beschreibung"),
@@ -50,47 +178,13 @@ class PhotoPage(CommonContextMixin, Page):
         FieldPanel("location", heading="Ort"),
     ]
 
+    thumbnail_field = "photo"
+
     def get_thumbnail(self):
         return self.photo
 
-    def _get_gallery_siblings(self):
-        """Get all gallery items (PhotoPage and VideoPage) ordered by date."""
-        parent = self.get_parent()
-        photos = PhotoPage.objects.child_of(parent).live().order_by("-date")
-        videos = VideoPage.objects.child_of(parent).live().order_by("-date")
 
-        # Combine and sort by date
-        all_items = sorted(
-            list(photos) + list(videos), key=lambda x: x.date, reverse=True
-        )
-        return all_items
-
-    def get_context(self, request):
-        context = super().get_context(request)
-        siblings = self._get_gallery_siblings()
-
-        try:
-            self_index = siblings.index(self)
-            if len(siblings) > 1:
-                context["previous"] = (
-                    siblings[self_index - 1] if self_index > 0 else siblings[-1]
-                )
-                context["next"] = (
-                    siblings[self_index + 1]
-                    if self_index < len(siblings) - 1
-                    else siblings[0]
-                )
-            else:
-                context["previous"] = None
-                context["next"] = None
-        except ValueError:
-            context["previous"] = None
-            context["next"] = None
-
-        return context
-
-
-class VideoPage(CommonContextMixin, Page):
+class VideoPage(GalleryItemMixin, CommonContextMixin, Page):
     """
     A gallery page for displaying animated GIFs and videos.
     """
@@ -134,6 +228,13 @@ class VideoPage(CommonContextMixin, Page):
     time: TimeField = TimeField(blank=True, null=True)
     location: CharField = CharField(max_length=255, default="", blank=True)
 
+    search_fields = Page.search_fields + [
+        index.SearchField("description"),
+        index.SearchField("author", boost=1.5),
+        index.SearchField("location"),
+        index.FilterField("date"),
+    ]
+
     content_panels = Page.content_panels + [
         FieldPanel("thumbnail", heading="Vorschaubild (für Galerie-Übersicht)"),
         FieldPanel("media_file", heading="Videodatei oder animiertes GIF"),
@@ -170,6 +271,8 @@ class VideoPage(CommonContextMixin, Page):
                     }
                 )
 
+    thumbnail_field = "thumbnail"
+
     def get_thumbnail(self):
         return self.thumbnail
 
@@ -182,42 +285,6 @@ class VideoPage(CommonContextMixin, Page):
     def get_media_url(self):
         return self.media_file.url if self.media_file else None
 
-    def _get_gallery_siblings(self):
-        """Get all gallery items (PhotoPage and VideoPage) ordered by date."""
-        parent = self.get_parent()
-        photos = PhotoPage.objects.child_of(parent).live().order_by("-date")
-        videos = VideoPage.objects.child_of(parent).live().order_by("-date")
-
-        # Combine and sort by date
-        all_items = sorted(
-            list(photos) + list(videos), key=lambda x: x.date, reverse=True
-        )
-        return all_items
-
-    def get_context(self, request):
-        context = super().get_context(request)
-        siblings = self._get_gallery_siblings()
-
-        try:
-            self_index = siblings.index(self)
-            if len(siblings) > 1:
-                context["previous"] = (
-                    siblings[self_index - 1] if self_index > 0 else siblings[-1]
-                )
-                context["next"] = (
-                    siblings[self_index + 1]
-                    if self_index < len(siblings) - 1
-                    else siblings[0]
-                )
-            else:
-                context["previous"] = None
-                context["next"] = None
-        except ValueError:
-            context["previous"] = None
-            context["next"] = None
-
-        return context
-
 
 class GalleryPage(CommonContextMixin, SidebarPromotionMixin, Page):
     description: RichTextField = RichTextField(max_length=800, default="")
@@ -238,18 +305,25 @@ class GalleryPage(CommonContextMixin, SidebarPromotionMixin, Page):
 
     subpage_types = [PhotoPage, VideoPage]
 
+    # Further pages are appended by the "load more" button, see beobgrp_site.js
+    ajax_template = "home/gallery_page_items.html"
+    items_per_page = 24
+
     def get_context(self, request):
         context = super().get_context(request)
-        photos = PhotoPage.objects.child_of(self).live().order_by("-date")
-        videos = VideoPage.objects.child_of(self).live().order_by("-date")
-
-        # Combine and sort by date
-        all_items = sorted(
-            list(photos) + list(videos), key=lambda x: x.date, reverse=True
-        )
-        context["photos"] = all_items
+        paginator = Paginator(get_gallery_items(self), self.items_per_page)
+        photos = paginator.get_page(request.GET.get("page"))
+        photos.object_list = list(photos.object_list.specific())
+        prefetch_thumbnails(photos.object_list)
+        context["photos"] = photos
         return context
 
+    def serve(self, request, *args, **kwargs):
+        response = super().serve(request, *args, **kwargs)
+        # The same URL renders the whole page or only the items for "load more"
+        patch_vary_headers(response, ["X-Requested-With"])
+        return response
+
 
 class GalleryIndexPage(CommonContextMixin, SidebarPromotionMixin, Page):
     description = RichTextField(max_length=800, default="")
@@ -264,5 +338,10 @@ class GalleryIndexPage(CommonContextMixin, SidebarPromotionMixin, Page):
 
     def get_context(self, request):
         context = super().get_context(request)
-        context["galleries"] = GalleryPage.objects.child_of(self).live()
+        context["galleries"] = (
+            GalleryPage.objects.child_of(self)
+            .live()
+            .select_related("cover_image")
+            .prefetch_related(prefetch_renditions("cover_image", "card"))
+        )
         return context
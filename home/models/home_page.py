@@ -9,6 +9,7 @@ from home.models.common import (
 from wagtail.admin.panels.field_panel import FieldPanel
 from wagtail.fields import StreamField
 from wagtail.models import Page
+from wagtail.search import index
 
 
 class HomePage(CommonContextMixin, SidebarPromotionMixin, Page):
@@ -23,6 +24,8 @@ class HomePage(CommonContextMixin, SidebarPromotionMixin, Page):
         default=[],
     )
 
+    search_fields = Page.search_fields + [index.SearchField("body")]
+
     content_panels = Page.content_panels + [FieldPanel("body", heading="Inhalt")]
     promote_panels = SidebarPromotionMixin.promote_panels
 
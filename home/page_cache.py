@@ -0,0 +1,176 @@
+"""
+Full-page cache for anonymous visitors.
+
+Rendered Wagtail pages are stored in the "pages" cache, keyed by host and URL.
+Each entry remembers the site-wide generation and the version of the page it
+was rendered from. Publishing a page bumps the version of the pages showing it
+(or the generation of the whole site), so stale entries are never served again
+and simply age out of the cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import quote_etag
+from django.utils.timezone import now
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from django.http import HttpRequest, HttpResponse
+    from wagtail.models import Page
+
+PAGE_CACHE_ALIAS = "pages"
+GENERATION_KEY = "home:page_cache:generation"
+PAGE_VERSION_KEY = "home:page_cache:page:{page_id}"
+RESPONSE_KEY = "home:page_cache:response:{generation}:{url_hash}"
+
+
+@dataclass
+class CachedPage:
+    """A rendered page together with the page version it was rendered from."""
+
+    page_id: int
+    page_version: str
+    response: HttpResponse
+
+
+def _get_cache():
+    return caches[PAGE_CACHE_ALIAS]
+
+
+def _get_token(key: str) -> str:
+    """
+    Return the token stored under key, creating one if it is missing.
+    Tokens never expire, but if one is evicted a new random token is created,
+    which invalidates everything rendered with the old one.
+    """
+    cache = _get_cache()
+    token = cache.get(key)
+    if token is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        token = cache.get(key)
+    return token
+
+
+def get_generation() -> str:
+    """
+    Return the site-wide generation, which changes whenever all cached pages
+    are purged, e.g. because an event was published.
+    """
+    return _get_token(GENERATION_KEY)
+
+
+def get_response_cache_key(request: HttpRequest) -> str:
+    url = "{}:{}:{}".format(
+        request.get_host(),
+        request.get_full_path(),
+        request.headers.get("x-requested-with", ""),
+    )
+    url_hash = hashlib.md5(url.encode("utf-8"), usedforsecurity=False).hexdigest()
+    return RESPONSE_KEY.format(generation=get_generation(), url_hash=url_hash)
+
+
+def get_page_etag(request: HttpRequest, page_id: int) -> str:
+    """
+    Return a strong ETag for the page rendered for request. It changes
+    whenever the page or anything shown on it is published, and when the
+    event-dependent parts of the page expire.
+    """
+    etag = "{}:{}:{}:{}".format(
+        get_response_cache_key(request),
+        _get_token(PAGE_VERSION_KEY.format(page_id=page_id)),
+        getattr(request, "page_cache_revision", None),
+        getattr(request, "page_cache_valid_until", None),
+    )
+    return quote_etag(
+        hashlib.md5(etag.encode("utf-8"), usedforsecurity=False).hexdigest()
+    )
+
+
+def get_cached_response(request: HttpRequest) -> HttpResponse | None:
+    cache_key = get_response_cache_key(request)
+    entry = _get_cache().get(cache_key)
+    if entry is None:
+        return None
+    if entry.page_version != _get_token(PAGE_VERSION_KEY.format(page_id=entry.page_id)):
+        return None
+    return entry.response
+
+
+def store_response(request: HttpRequest, page_id: int, response: HttpResponse) -> None:
+    timeout = settings.PAGE_CACHE_TIMEOUT
+    valid_until = getattr(request, "page_cache_valid_until", None)
+    if valid_until is not None:
+        timeout = min(timeout, math.ceil((valid_until - now()).total_seconds()))
+        if timeout <= 0:
+            return
+
+    entry = CachedPage(
+        page_id=page_id,
+        page_version=_get_token(PAGE_VERSION_KEY.format(page_id=page_id)),
+        response=response,
+    )
+    _get_cache().set(get_response_cache_key(request), entry, timeout=timeout)
+
+
+def mark_page_cacheable(request: HttpRequest, page: Page) -> None:
+    """Record on the request which page is being served, so its response may be cached."""
+    # Pages behind a password or login must never be shared between visitors
+    if not page.get_view_restrictions().exists():
+        request.page_cache_page_id = page.pk  # type: ignore[attr-defined]
+        request.page_cache_revision = page.latest_revision_created_at  # type: ignore[attr-defined]
+
+
+def limit_cache_validity(request: HttpRequest | None, valid_until: datetime) -> None:
+    """
+    Make sure the response to request is not served from the cache after
+    valid_until, e.g. because an event shown on the page has started by then.
+    """
+    if request is None:
+        return
+    current = getattr(request, "page_cache_valid_until", None)
+    if current is None or valid_until < current:
+        request.page_cache_valid_until = valid_until  # type: ignore[attr-defined]
+
+
+def purge_pages(*pages: Page | None) -> None:
+    """Invalidate all cached responses rendered from the given pages."""
+    _get_cache().set_many(
+        {
+            PAGE_VERSION_KEY.format(page_id=page.pk): uuid4().hex
+            for page in pages
+            if page is not None
+        },
+        timeout=None,
+    )
+
+
+def purge_all_pages() -> None:
+    """Invalidate all cached responses of all sites."""
+    _get_cache().set(GENERATION_KEY, uuid4().hex, timeout=None)
+
+
+def purge_pages_showing(page: Page) -> None:
+    """
+    Invalidate the cached responses of every page that displays the given page.
+
+    Events appear in the "Aktuelles" sidebar, promoted pages in the sidebar and
+    menu pages in the navigation of every page, so those purge the whole site.
+    Gallery items only appear on their own page, their gallery and the
+    previous/next links of their siblings.
+    """
+    from home.models import SingleEvent
+    from home.models.common import SidebarPromotionMixin
+
+    if isinstance(page, (SingleEvent, SidebarPromotionMixin)) or page.show_in_menus:
+        purge_all_pages()
+    else:
+        purge_pages(page.get_parent(), *page.get_siblings(inclusive=True))
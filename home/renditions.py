@@ -0,0 +1,192 @@
+"""
+Rendition presets for the images shown on the site.
+
+Each preset lists the widths an image is rendered in and the sizes attribute
+describing how wide it is displayed in the Bulma columns of its template.
+The main content column takes four fifths of the viewport next to the sidebar
+on tablets and desktops, and the whole viewport on mobile.
+
+Every width is rendered as AVIF and WebP, and as JPEG (or PNG, to keep
+transparency) for browsers supporting neither.
+
+Renditions are created in a background thread pool when an image is uploaded
+or a page showing it is published, so visitors do not have to wait for them.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Prefetch
+from wagtail.images import get_image_model
+from wagtail.images.models import SourceImageIOError
+
+if TYPE_CHECKING:
+    from wagtail.images.models import AbstractImage
+    from wagtail.models import Page
+
+logger = logging.getLogger(__name__)
+
+# Thumbnails and event images share their renditions
+CARD_WIDTHS = (320, 480, 640, 960)
+
+# Formats offered in <picture> sources, in order of preference
+MODERN_FORMATS = ("avif", "webp")
+FALLBACK_FORMATS = ("jpeg", "png")
+
+
+def get_fallback_format(image: AbstractImage) -> str:
+    return "png" if image.filename.lower().endswith(".png") else "jpeg"
+
+
+@dataclass(frozen=True)
+class ImagePreset:
+    widths: tuple[int, ...]
+    sizes: str
+
+    def get_filter_specs(self, image: AbstractImage) -> list[str]:
+        return self._get_filter_specs((*MODERN_FORMATS, get_fallback_format(image)))
+
+    @property
+    def all_filter_specs(self) -> list[str]:
+        """The filter specs for images of any format, e.g. to prefetch renditions."""
+        return self._get_filter_specs((*MODERN_FORMATS, *FALLBACK_FORMATS))
+
+    def _get_filter_specs(self, image_formats: tuple[str, ...]) -> list[str]:
+        return [
+            f"width-{width}|format-{image_format}"
+            for image_format in image_formats
+            for width in self.widths
+        ]
+
+
+IMAGE_PRESETS = {
+    # Gallery cards: a quarter of the content column on desktops, half on tablets
+    "card": ImagePreset(
+        widths=CARD_WIDTHS,
+        sizes="(min-width: 1024px) 20vw, (min-width: 769px) 40vw, 100vw",
+    ),
+    # Event cards: half of a card, which is half of the content column on desktops
+    "event": ImagePreset(
+        widths=CARD_WIDTHS,
+        sizes="(min-width: 1024px) 20vw, (min-width: 769px) 40vw, 50vw",
+    ),
+    # Images next to a caption in an ImageWithCaptionBlock
+    "caption": ImagePreset(
+        widths=(160, 320, 480),
+        sizes="(min-width: 1024px) 10vw, (min-width: 769px) 20vw, 33vw",
+    ),
+    # Photos and images spanning the whole content column
+    "content": ImagePreset(
+        widths=(640, 960, 1280, 1920, 2560),
+        sizes="(min-width: 769px) 80vw, 100vw",
+    ),
+}
+
+# Presets every uploaded image is rendered in: most uploads are gallery photos,
+# gallery cover images and event images, which are all shown on cards
+UPLOAD_PRESETS = ("card",)
+
+# Image fields of pages and the presets their templates render them in
+PAGE_IMAGE_PRESETS: dict[str, dict[str, tuple[str, ...]]] = {
+    "home.PhotoPage": {"photo": ("card", "content")},
+    "home.VideoPage": {"thumbnail": ("card",)},
+    "home.GalleryPage": {"cover_image": ("card",)},
+    "home.SingleEvent": {"image": ("event",)},
+}
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_filter_specs(image: AbstractImage, preset_names: Iterable[str]) -> list[str]:
+    specs = (
+        spec
+        for preset_name in preset_names
+        for spec in IMAGE_PRESETS[preset_name].get_filter_specs(image)
+    )
+    return list(dict.fromkeys(specs))
+
+
+def prefetch_renditions(lookup: str, preset_name: str) -> Prefetch:
+    """
+    Return a Prefetch loading the renditions of a preset for the images found
+    at lookup, e.g. GalleryPage.objects.prefetch_related(
+        prefetch_renditions("cover_image", "card")
+    )
+    """
+    Rendition = get_image_model().get_rendition_model()
+    return Prefetch(
+        f"{lookup}__renditions",
+        queryset=Rendition.objects.filter(
+            filter_spec__in=IMAGE_PRESETS[preset_name].all_filter_specs
+        ),
+        to_attr="prefetched_renditions",
+    )
+
+
+def get_page_images(page: Page) -> Iterator[tuple[AbstractImage, tuple[str, ...]]]:
+    """Yield the images shown by a page with the presets they are rendered in."""
+    for field_name, preset_names in PAGE_IMAGE_PRESETS.get(
+        page._meta.label, {}
+    ).items():
+        image = getattr(page, field_name)
+        if image is not None:
+            yield image, preset_names
+
+
+def generate_renditions(image: AbstractImage, preset_names: Iterable[str]) -> None:
+    """Create the missing renditions of an image for the given presets."""
+    try:
+        image.get_renditions(*get_filter_specs(image, preset_names))
+    except SourceImageIOError:
+        logger.warning("Cannot create renditions, file of image %s missing", image.pk)
+
+
+def _generate_renditions_in_background(
+    image_id: int, preset_names: tuple[str, ...]
+) -> None:
+    try:
+        image = get_image_model().objects.filter(pk=image_id).first()
+        if image is not None:
+            generate_renditions(image, preset_names)
+    except Exception:
+        logger.exception("Cannot create renditions of image %s", image_id)
+    finally:
+        # Connections are per thread, close the one opened by this worker
+        connections.close_all()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RENDITION_WORKERS, thread_name_prefix="renditions"
+        )
+    return _executor
+
+
+def schedule_renditions(
+    image: AbstractImage | None, preset_names: tuple[str, ...] = UPLOAD_PRESETS
+) -> None:
+    """
+    Create the renditions of an image in the background once the current
+    transaction is committed. With RENDITION_WORKERS set to 0 they are
+    created right away instead.
+    """
+    if image is None:
+        return
+    if settings.RENDITION_WORKERS == 0:
+        transaction.on_commit(lambda: generate_renditions(image, preset_names))
+    else:
+        image_id = image.pk
+        transaction.on_commit(
+            lambda: _get_executor().submit(
+                _generate_renditions_in_background, image_id, preset_names
+            )
+        )
@@ -0,0 +1,217 @@
+"""
+Cached content of the sidebar shown on every page using CommonContextMixin.
+
+The list of promoted pages only changes when an editor publishes, unpublishes,
+moves or deletes a page, so it is built once per site and kept in the shared
+cache until one of the signal handlers in home.signals invalidates it.
+
+The upcoming events are cached the same way, but only until the first of them
+starts and drops out of the list.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from math import ceil
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+from wagtail.images import get_image_model
+from wagtail.images.shortcuts import get_rendition_or_not_found
+from wagtail.models import Page, Site, get_page_models
+
+SIDEBAR_PAGES_CACHE_KEY = "home:sidebar_pages:{site_id}"
+UPCOMING_EVENTS_CACHE_KEY = "home:upcoming_events:{site_id}"
+UPCOMING_EVENTS_COUNT = 2
+# Icons are displayed 1.5em high, rendered sharp for high-density screens
+SIDEBAR_ICON_FILTER = "height-48"
+
+
+@dataclass(frozen=True)
+class SidebarLink:
+    """A promoted page as rendered by includes/side_page.html."""
+
+    url: str
+    text: str
+    icon_url: str = ""
+
+
+@dataclass(frozen=True)
+class UpcomingEvent:
+    """An upcoming event as rendered by includes/side_info.html."""
+
+    parent_url: str
+    web_id: str
+    event_type: str
+    event_title: str
+    start_time: datetime
+    cancelled: bool
+    booked_out: bool
+    status: str
+
+
+def _get_sidebar_cache_key(site: Site | None) -> str:
+    return SIDEBAR_PAGES_CACHE_KEY.format(site_id=site.pk if site else "none")
+
+
+def _get_upcoming_events_cache_key(site: Site | None) -> str:
+    return UPCOMING_EVENTS_CACHE_KEY.format(site_id=site.pk if site else "none")
+
+
+def _get_promotion_models() -> list[type[Page]]:
+    from home.models.common import SidebarPromotionMixin
+
+    return [
+        model for model in get_page_models() if issubclass(model, SidebarPromotionMixin)
+    ]
+
+
+def is_sidebar_icon(image) -> bool:
+    """Return whether the image is the sidebar icon of any promoted page."""
+    used_as_icon = Q()
+    for model in _get_promotion_models():
+        used_as_icon |= Q(**{f"{model._meta.model_name}__sidebar_icon": image})
+    return Page.objects.filter(used_as_icon).exists()
+
+
+def _build_sidebar_links(site: Site | None) -> list[SidebarLink]:
+    """
+    Fetch all promoted pages with a single query over the page tree, joined to
+    the tables of the page types carrying the SidebarPromotionMixin fields and
+    ordered by latest revision (most recently modified first). The sidebar
+    icons and their renditions are then loaded in bulk.
+    """
+    accessors = [model._meta.model_name for model in _get_promotion_models()]
+
+    promoted = Q()
+    for accessor in accessors:
+        promoted |= Q(**{f"{accessor}__show_in_sidebar": True})
+
+    pages = (
+        Page.objects.live()
+        .public()
+        .filter(promoted)
+        .select_related(*accessors)
+        .order_by(
+            Coalesce("latest_revision_created_at", "first_published_at").desc(
+                nulls_last=True
+            ),
+            "pk",
+        )
+    )
+
+    promotions = []
+    for page in pages:
+        for accessor in accessors:
+            specific_page = getattr(page, accessor, None)
+            if specific_page is not None:
+                promotions.append((page, specific_page))
+                break
+
+    icon_ids = {
+        specific_page.sidebar_icon_id
+        for _, specific_page in promotions
+        if specific_page.sidebar_icon_id
+    }
+    icons = (
+        get_image_model()
+        .objects.prefetch_renditions(SIDEBAR_ICON_FILTER)
+        .in_bulk(icon_ids)
+        if icon_ids
+        else {}
+    )
+
+    links = []
+    for page, specific_page in promotions:
+        icon = icons.get(specific_page.sidebar_icon_id)
+        links.append(
+            SidebarLink(
+                url=page.get_url(current_site=site) or "",
+                text=specific_page.sidebar_text or page.title,
+                icon_url=(
+                    get_rendition_or_not_found(icon, SIDEBAR_ICON_FILTER).url
+                    if icon
+                    else ""
+                ),
+            )
+        )
+    return links
+
+
+def get_sidebar_links(site: Site | None) -> list[SidebarLink]:
+    """
+    Return the pages promoted in the sidebar of the given site,
+    most recently modified first.
+    """
+    cache_key = _get_sidebar_cache_key(site)
+    links = cache.get(cache_key)
+    if links is None:
+        links = _build_sidebar_links(site)
+        cache.set(cache_key, links, timeout=None)
+    return links
+
+
+def _build_upcoming_events(site: Site | None) -> list[UpcomingEvent]:
+    """
+    Fetch the next events with one query and the pages listing them, whose
+    URLs the sidebar links to, with a second one.
+    """
+    from home.models.events import SingleEvent
+
+    events = list(
+        SingleEvent.objects.live()
+        .public()
+        .filter(start_time__gte=now())
+        .order_by("start_time")[:UPCOMING_EVENTS_COUNT]
+    )
+    parent_paths = {event.path[: -SingleEvent.steplen] for event in events}
+    parents = {
+        parent.path: parent for parent in Page.objects.filter(path__in=parent_paths)
+    }
+
+    return [
+        UpcomingEvent(
+            parent_url=parents[event.path[: -SingleEvent.steplen]].get_url(
+                current_site=site
+            )
+            or "",
+            web_id=event.web_id,
+            event_type=event.event_type,
+            event_title=event.event_title,
+            start_time=event.start_time,
+            cancelled=event.cancelled,
+            booked_out=event.booked_out,
+            status=event.status,
+        )
+        for event in events
+    ]
+
+
+def get_upcoming_events(site: Site | None) -> list[UpcomingEvent]:
+    """
+    Return the next events for the "Aktuelles" sidebar of the given site,
+    soonest first.
+    """
+    cache_key = _get_upcoming_events_cache_key(site)
+    events = cache.get(cache_key)
+    if events is None:
+        events = _build_upcoming_events(site)
+        # The list changes when its first event starts
+        timeout = (
+            ceil((events[0].start_time - now()).total_seconds()) if events else None
+        )
+        if timeout is None or timeout > 0:
+            cache.set(cache_key, events, timeout=timeout)
+    return events
+
+
+def invalidate_sidebar_cache() -> None:
+    """Drop the cached sidebar of all sites so it is rebuilt on the next request."""
+    cache_keys = []
+    for site in [*Site.objects.all(), None]:
+        cache_keys.append(_get_sidebar_cache_key(site))
+        cache_keys.append(_get_upcoming_events_cache_key(site))
+    cache.delete_many(cache_keys)
@@ -0,0 +1,133 @@
+"""
+Signal handlers keeping caches, image renditions and the positions of gallery
+items in sync with the page tree.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django_tasks.signals import task_finished
+from modelsearch.tasks import insert_or_update_object_task
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction, Site
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from home import ical
+from home.models.common import SidebarPromotionMixin
+from home.models.events import SingleEvent
+from home.models.gallery import (
+    GalleryItemMixin,
+    GalleryItemPosition,
+    PhotoPage,
+    VideoPage,
+)
+from home.page_cache import purge_all_pages, purge_pages_showing
+from home.renditions import get_page_images, schedule_renditions
+from home.sidebar import invalidate_sidebar_cache, is_sidebar_icon
+from search.result_cache import invalidate_search_results
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def invalidate_caches_on_publish(sender, instance, **kwargs):
+    if isinstance(instance, (SidebarPromotionMixin, SingleEvent)):
+        invalidate_sidebar_cache()
+    purge_pages_showing(instance)
+    invalidate_search_results()
+
+
+@receiver(post_delete)
+def invalidate_caches_on_delete(sender, instance, **kwargs):
+    if isinstance(instance, (SidebarPromotionMixin, SingleEvent)):
+        invalidate_sidebar_cache()
+    if isinstance(instance, Page):
+        purge_all_pages()
+        invalidate_search_results()
+
+
+@receiver(post_page_move)
+@receiver(page_slug_changed)
+def invalidate_caches_on_url_change(sender, instance, **kwargs):
+    # Moving or renaming any page may change the URL of a promoted descendant
+    invalidate_sidebar_cache()
+    purge_all_pages()
+    invalidate_search_results()
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+@receiver(post_delete, sender=get_image_model())
+def invalidate_caches_on_site_or_image_change(sender, instance, **kwargs):
+    # The sidebar icon of a deleted image is already set to NULL at this point,
+    # so it cannot be told whether the image was used as one
+    invalidate_sidebar_cache()
+    purge_all_pages()
+
+
+@receiver(post_save, sender=PageViewRestriction)
+@receiver(post_delete, sender=PageViewRestriction)
+def invalidate_caches_on_restriction_change(sender, instance, **kwargs):
+    # Pages are only checked for view restrictions when they are rendered,
+    # a restriction also applies to all pages below the restricted one. The
+    # iCalendar feeds follow the generation of the page cache.
+    invalidate_sidebar_cache()
+    purge_all_pages()
+    invalidate_search_results()
+
+
+@receiver(post_save, sender=get_image_model())
+def invalidate_caches_on_image_save(sender, instance, **kwargs):
+    if is_sidebar_icon(instance):
+        invalidate_sidebar_cache()
+    purge_all_pages()
+
+
+@receiver(post_save, sender=get_image_model())
+def pregenerate_renditions_on_upload(sender, instance, **kwargs):
+    schedule_renditions(instance)
+
+
+@receiver(page_published)
+def pregenerate_renditions_on_publish(sender, instance, **kwargs):
+    for image, preset_names in get_page_images(instance):
+        schedule_renditions(image, preset_names)
+
+
+@receiver(page_published, sender=SingleEvent)
+def update_ical_event_on_publish(sender, instance, **kwargs):
+    ical.update_event(instance)
+
+
+@receiver(post_save, sender=PhotoPage)
+@receiver(post_save, sender=VideoPage)
+def update_gallery_position_on_save(sender, instance, update_fields=None, **kwargs):
+    # Saving a draft only writes some fields of the live page, the date of the
+    # page in memory may then be the unpublished one
+    if update_fields is None or {"date", "live"} & set(update_fields):
+        instance.update_gallery_position()
+
+
+@receiver(page_unpublished, sender=PhotoPage)
+@receiver(page_unpublished, sender=VideoPage)
+def remove_gallery_position_on_unpublish(sender, instance, **kwargs):
+    instance.update_gallery_position()
+
+
+@receiver(post_page_move)
+def update_gallery_position_on_move(sender, instance, parent_page_after, **kwargs):
+    if issubclass(sender, GalleryItemMixin):
+        GalleryItemPosition.objects.filter(page_id=instance.pk).update(
+            gallery=parent_page_after
+        )
+
+
+@receiver(task_finished)
+def invalidate_search_results_on_index_update(sender, task_result, **kwargs):
+    # The search index is updated after the page was published, results
+    # cached in the meantime must not be served
+    if task_result.task.func is insert_or_update_object_task.func:
+        invalidate_search_results()
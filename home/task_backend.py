@@ -0,0 +1,152 @@
+"""
+Task backend running tasks in background threads of the web process.
+
+Wagtail enqueues tasks, e.g. to update the search index, whenever a page is
+saved. With the default ImmediateBackend they run inside the request, so
+publishing a page with a long StreamField waits until its whole body is
+indexed. This backend runs them in a small thread pool once the current
+transaction is committed, without an external broker. It is a backend of
+django-tasks, which Wagtail and modelsearch enqueue their tasks with, not
+of the django.tasks framework built into Django 6.
+
+Publishing saves a page several times, each save enqueueing the same task
+with the same arguments. Such tasks are coalesced while they wait, so each
+update runs once; the results of the coalesced tasks never leave the READY
+state. Tasks waiting when the process exits still run before it stops, but
+tasks lost in a crash are not recovered: ./manage.py reindex_search brings
+the search index up to date again.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from django.db import connections, transaction
+from django.utils import timezone
+from django_tasks import BaseTaskBackend
+from django_tasks.base import Task, TaskContext, TaskError, TaskResult, TaskResultStatus
+from django_tasks.signals import task_enqueued, task_finished, task_started
+from django_tasks.utils import (
+    get_exception_traceback,
+    get_module_path,
+    get_random_id,
+    normalize_json,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundThreadBackend(BaseTaskBackend):
+    """
+    Run tasks in background threads after the transaction is committed.
+
+    OPTIONS: WORKERS, the number of threads (default 1, which also runs the
+    tasks in the order they were enqueued).
+    """
+
+    def __init__(self, alias: str, params: dict):
+        super().__init__(alias, params)
+        self.workers = self.options.get("WORKERS", 1)
+        self.worker_id = get_random_id()
+        self._executor: ThreadPoolExecutor | None = None
+        # Tasks submitted to the pool but not started yet, by _get_key()
+        self._waiting: dict[tuple[str, str], TaskResult] = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, task: Task, args: Any, kwargs: Any) -> TaskResult:
+        self.validate_task(task)
+        task_result: TaskResult = TaskResult(
+            task=task,
+            id=get_random_id(),
+            status=TaskResultStatus.READY,
+            enqueued_at=None,
+            started_at=None,
+            last_attempted_at=None,
+            finished_at=None,
+            args=args,
+            kwargs=kwargs,
+            backend=self.alias,
+            errors=[],
+            worker_ids=[],
+        )
+        # Tasks must not see the data of an uncommitted transaction, and tasks
+        # of a transaction that is rolled back must not run at all
+        transaction.on_commit(partial(self._submit, task_result))
+        return task_result
+
+    def _get_key(self, task_result: TaskResult) -> tuple[str, str]:
+        # Arguments are normalised to JSON by TaskResult
+        arguments = json.dumps([task_result.args, task_result.kwargs], sort_keys=True)
+        return task_result.task.module_path, arguments
+
+    def _submit(self, task_result: TaskResult) -> None:
+        key = self._get_key(task_result)
+        with self._lock:
+            if key in self._waiting:
+                return
+            self._waiting[key] = task_result
+            # TaskResult is frozen, backends record the progress of a task by
+            # setting its fields anyway
+            object.__setattr__(task_result, "enqueued_at", timezone.now())
+            task_enqueued.send(type(self), task_result=task_result)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f"tasks-{self.alias}"
+                )
+            self._executor.submit(self._run, key)
+
+    def _run(self, key: tuple[str, str]) -> None:
+        with self._lock:
+            task_result = self._waiting.pop(key)
+        try:
+            self._execute(task_result)
+        except Exception:
+            # Raised by a signal receiver, errors of the task are recorded
+            logger.exception("Cannot run task %s", task_result.task.module_path)
+        finally:
+            # Connections are per thread, close the ones opened by this worker
+            connections.close_all()
+
+    def _execute(self, task_result: TaskResult) -> None:
+        """Run the task and record its outcome, errors are logged by django_tasks."""
+        task = task_result.task
+        started_at = timezone.now()
+        object.__setattr__(task_result, "status", TaskResultStatus.RUNNING)
+        object.__setattr__(task_result, "started_at", started_at)
+        object.__setattr__(task_result, "last_attempted_at", started_at)
+        task_result.worker_ids.append(self.worker_id)
+        task_started.send(type(self), task_result=task_result)
+
+        args = list(task_result.args)
+        if task.takes_context:
+            args.insert(0, TaskContext(task_result=task_result))
+        try:
+            return_value = task.call(*args, **task_result.kwargs)
+        except Exception as e:
+            task_result.errors.append(
+                TaskError(
+                    exception_class_path=get_module_path(type(e)),
+                    traceback=get_exception_traceback(e),
+                )
+            )
+            status = TaskResultStatus.FAILED
+        else:
+            object.__setattr__(
+                task_result, "_return_value", normalize_json(return_value)
+            )
+            status = TaskResultStatus.SUCCESSFUL
+        object.__setattr__(task_result, "finished_at", timezone.now())
+        object.__setattr__(task_result, "status", status)
+        task_finished.send(type(self), task_result=task_result)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads, by default after running the waiting tasks."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,30 @@
+from django import template
+from wagtail.images.models import Picture
+from wagtail.images.shortcuts import get_renditions_or_not_found
+
+from home.renditions import IMAGE_PRESETS
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, preset_name: str, **attrs):
+    """
+    Render a <picture> with a source per image format, each with a srcset of
+    the renditions of the given preset from home.renditions, e.g.
+    {% responsive_image page.photo "content" class="is-fluid" %}
+    """
+    if not image:
+        return ""
+    preset = IMAGE_PRESETS[preset_name]
+    renditions = get_renditions_or_not_found(image, preset.get_filter_specs(image))
+
+    # Images are never upscaled, so small images yield the same width repeatedly
+    unique_renditions = {}
+    seen = set()
+    for spec, rendition in renditions.items():
+        image_format = spec.rpartition("format-")[2]
+        if (image_format, rendition.width) not in seen:
+            seen.add((image_format, rendition.width))
+            unique_renditions[spec] = rendition
+    return Picture(unique_renditions, {"sizes": preset.sizes, **attrs})
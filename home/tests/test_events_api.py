@@ -0,0 +1,103 @@
+"""
+Tests for the JSON events API
+"""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from wagtail.models import Page, Site
+
+from home.models import EventPage, EventTypes, HomePage, SingleEvent
+
+
+class EventsApiTests(TestCase):
+    """Tests for listing and paginating events as JSON."""
+
+    def setUp(self):
+        root = Page.objects.get(id=1)
+        home = root.add_child(instance=HomePage(title="Start", slug="start"))
+        Site.objects.all().delete()
+        Site.objects.create(hostname="testserver", root_page=home, is_default_site=True)
+        self.events = home.add_child(
+            instance=EventPage(title="Termine", slug="termine")
+        )
+        self.start_time = now() + timedelta(days=3)
+
+    def add_event(self, event_title, **kwargs):
+        return self.events.add_child(
+            instance=SingleEvent(
+                start_time=self.start_time,
+                event_type=EventTypes.TALK,
+                event_title=event_title,
+                **kwargs,
+            )
+        )
+
+    def get_json(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        return response.json()
+
+    def test_event_fields(self):
+        """Test that events are listed with status and reservation state."""
+        event = self.add_event("Mondfinsternis", booked_out=True, referent="Dr. Mond")
+        data = self.get_json("/api/events/")
+        self.assertIsNone(data["next"])
+        self.assertEqual(
+            data["events"][0],
+            {
+                "id": event.web_id,
+                "url": f"http://testserver/e/{event.web_id}",
+                "start_time": data["events"][0]["start_time"],
+                "event_type": "Vortrag",
+                "event_title": "Mondfinsternis",
+                "referent": "Dr. Mond",
+                "location": "Deutsches Museum",
+                "status": "ausgebucht",
+                "needs_reservation": True,
+                "reservable": False,
+                "reservation_date": event.first_reservation_date.isoformat(),
+            },
+        )
+
+    def test_cursor_pagination_visits_every_event_once(self):
+        """Test that pages continue after the last event, also for equal start times."""
+        titles = [f"Vortrag {number}" for number in range(5)]
+        for title in titles:
+            self.add_event(title)
+
+        seen = []
+        url = "/api/events/?limit=2"
+        while url:
+            data = self.get_json(url)
+            seen += [event["event_title"] for event in data["events"]]
+            url = data["next"]
+        self.assertEqual(sorted(seen), titles)
+
+    def test_only_listed_columns_are_selected(self):
+        """Test that large columns such as the abstract are not loaded."""
+        self.add_event("Mondfinsternis")
+        with CaptureQueriesContext(connection) as queries:
+            self.get_json("/api/events/")
+        event_query = next(
+            query["sql"] for query in queries if "home_singleevent" in query["sql"]
+        )
+        self.assertNotIn("abstract", event_query)
+        self.assertNotIn("reservation_mailto_link", event_query)
+
+    def test_unchanged_response_returns_304(self):
+        """Test that clients revalidating an unchanged list get 304."""
+        self.add_event("Mondfinsternis")
+        etag = self.client.get("/api/events/")["ETag"]
+        response = self.client.get("/api/events/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_parameters_are_rejected(self):
+        """Test that broken cursors and limits are answered with 400."""
+        for query in ("cursor=broken", "limit=0", "limit=1000", "type=party"):
+            response = self.client.get(f"/api/events/?{query}")
+            self.assertEqual(response.status_code, 400, query)
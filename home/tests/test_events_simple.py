@@ -2,13 +2,21 @@
 Simplified tests for EventPage and SingleEvent models
 """
 
-from django.test import TestCase
+from unittest import mock
+from urllib.parse import unquote
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from datetime import datetime, timedelta
 from django.utils.timezone import make_aware
+from wagtail.models import Page, Site
 from wagtail.rich_text import RichText
 
-from home.models import EventPage, SingleEvent, EventTypes
-from home.models.events import _get_rich_text_plain_text
+from home.event_index import clear_event_index
+from home.models import EventPage, HomePage, SingleEvent, EventTypes
+from home.models.events import _get_rich_text_plain_text, _get_web_id
 
 
 class EventPageSimpleTests(TestCase):
@@ -102,6 +110,23 @@ class SingleEventSimpleTests(TestCase):
         expected_date = (start_time.date()) - timedelta(weeks=4)
         self.assertEqual(event.first_reservation_date, expected_date)
 
+    def test_valid_until_waits_for_reservation(self):
+        """Test that an event card changes when its reservation opens."""
+        start_time = make_aware(datetime.now() + timedelta(weeks=10))
+        event = SingleEvent(
+            title="Test Talk",
+            slug="test-talk",
+            event_title="Test Talk",
+            start_time=start_time,
+            event_type=EventTypes.TALK,
+            referent="Speaker",
+            abstract=RichText("Abstract"),
+        )
+        self.assertEqual(event.get_valid_until(), event.reservation_opens_at)
+
+        event.booked_out = True
+        self.assertEqual(event.get_valid_until(), start_time)
+
     def test_rich_text_plain_text_length_ignores_markup(self):
         """Test that rich text length checks are based on visible text."""
         rich_text = "<p>" + ("a" * 576) + "</p>"
@@ -114,3 +139,154 @@ class SingleEventSimpleTests(TestCase):
     def test_rich_text_plain_text_treats_markup_only_as_empty(self):
         """Test that markup-only rich text does not count as content."""
         self.assertEqual(_get_rich_text_plain_text("<p><br></p>"), "")
+
+
+class EventListTests(TestCase):
+    """Tests for rendering the event lists of an event page."""
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["pages"].clear()
+        clear_event_index()
+        root = Page.objects.get(id=1)
+        self.home = root.add_child(instance=HomePage(title="Start", slug="start"))
+        Site.objects.all().delete()
+        Site.objects.create(
+            hostname="testserver", root_page=self.home, is_default_site=True
+        )
+        column = {
+            "max_columns": "2",
+            "min_columns": "1",
+            "width": "full",
+            "content": [
+                ("event_list", {"event_type": [EventTypes.TALK]}),
+                ("event_list", {"event_type": [EventTypes.OBSERVE]}),
+            ],
+        }
+        self.events = self.home.add_child(
+            instance=EventPage(
+                title="Termine",
+                slug="termine",
+                body=[("event_list", {"event_type": []}), ("multi_column", column)],
+            )
+        )
+        self.add_event(EventTypes.TALK, "Mondfinsternis")
+        self.add_event(EventTypes.OBSERVE, "Sternschnuppen")
+
+    def add_event(self, event_type, event_title):
+        return self.events.add_child(
+            instance=SingleEvent(
+                start_time=make_aware(datetime.now() + timedelta(days=3)),
+                event_type=event_type,
+                event_title=event_title,
+            )
+        )
+
+    def get_event_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/termine/")
+        return response, [
+            query for query in queries if 'FROM "home_singleevent"' in query["sql"]
+        ]
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_event_lists_share_one_query(self):
+        """Test that all event lists of a page query the events once."""
+        # Fill the cached sidebar, which lists the upcoming events as well
+        self.get_event_queries()
+        clear_event_index()
+        response, queries = self.get_event_queries()
+        self.assertEqual(len(queries), 1)
+        # Both events in the list of all types and each in the list of its type
+        self.assertContains(response, '<div class="card" id="event-', count=4)
+
+        _, queries = self.get_event_queries()
+        self.assertEqual(queries, [])
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_published_event_is_listed(self):
+        """Test that publishing an event replaces the indexed events."""
+        self.get_event_queries()
+        self.add_event(EventTypes.TALK, "Saturn").save_revision().publish()
+        response, _ = self.get_event_queries()
+        self.assertContains(response, "Saturn")
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_rendering_uses_stored_card_fields(self):
+        """Test that event cards are rendered without hashing or building links."""
+        with (
+            mock.patch("home.models.events._get_web_id") as get_web_id,
+            mock.patch(
+                "home.models.events._get_reservation_mailto_link"
+            ) as get_mailto_link,
+        ):
+            self.client.get("/termine/")
+        get_web_id.assert_not_called()
+        get_mailto_link.assert_not_called()
+
+    def test_card_fields_follow_changes(self):
+        """Test that the stored card fields are updated when an event changes."""
+        event = SingleEvent.objects.get(event_title="Mondfinsternis")
+        self.assertIn("Mondfinsternis", unquote(event.reservation_mailto_link))
+
+        event.event_title = "Totale Mondfinsternis"
+        event.start_time += timedelta(weeks=10)
+        event.save_revision().publish()
+        event.refresh_from_db()
+        self.assertEqual(
+            event.reservation_date, (event.start_time - timedelta(weeks=4)).date()
+        )
+        self.assertIn("Totale Mondfinsternis", unquote(event.reservation_mailto_link))
+
+
+class EventShortLinkTests(TestCase):
+    """Tests for the stored event IDs and the /e/<web_id> short links."""
+
+    def setUp(self):
+        root = Page.objects.get(id=1)
+        home = root.add_child(instance=HomePage(title="Start", slug="start"))
+        Site.objects.all().delete()
+        Site.objects.create(hostname="testserver", root_page=home, is_default_site=True)
+        self.events = home.add_child(
+            instance=EventPage(title="Termine", slug="termine")
+        )
+        self.event = self.events.add_child(
+            instance=SingleEvent(
+                start_time=make_aware(datetime.now() + timedelta(days=3)),
+                event_type=EventTypes.TALK,
+                event_title="Mondfinsternis",
+            )
+        )
+
+    def test_web_id_is_kept_when_event_changes(self):
+        """Test that links to an event stay valid when its title changes."""
+        web_id = self.event.web_id
+        self.assertEqual(web_id, _get_web_id(self.event.title))
+        self.event.event_title = "Totale Mondfinsternis"
+        self.event.save_revision().publish()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.web_id, web_id)
+
+    def test_copy_gets_new_web_id(self):
+        """Test that a copied event, which has the same title, gets its own ID."""
+        archive = self.events.add_child(
+            instance=EventPage(title="Archiv", slug="archiv")
+        )
+        copy = self.event.copy(to=archive)
+        self.assertNotEqual(copy.specific.web_id, self.event.web_id)
+        self.assertEqual(len(copy.specific.web_id), 8)
+
+    def test_short_link_redirects_to_event_card(self):
+        """Test that the short link leads to the event on its event page."""
+        response = self.client.get(f"/e/{self.event.web_id}")
+        self.assertRedirects(
+            response,
+            f"/termine/#event-{self.event.web_id}",
+            fetch_redirect_response=False,
+        )
+
+    def test_short_link_of_unpublished_event_is_not_found(self):
+        """Test that unknown and unpublished events are not found."""
+        self.assertEqual(self.client.get("/e/00000000").status_code, 404)
+        self.event.unpublish()
+        self.assertEqual(self.client.get(f"/e/{self.event.web_id}").status_code, 404)
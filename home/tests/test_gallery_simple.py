@@ -2,10 +2,17 @@
 Simplified tests for Gallery models
 """
 
-from django.test import TestCase
+from datetime import date
+from unittest import mock
+
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from wagtail.images import get_image_model
+from wagtail.models import Page
 from wagtail.rich_text import RichText
 
-from home.models import GalleryIndexPage, GalleryPage, PhotoPage
+from home.models import GalleryIndexPage, GalleryPage, PhotoPage, VideoPage
 
 
 class GallerySimpleTests(TestCase):
@@ -56,3 +63,132 @@ class GallerySimpleTests(TestCase):
         self.assertTrue(hasattr(photo, "photo"))
         self.assertTrue(hasattr(photo, "date"))
         self.assertTrue(hasattr(photo, "description"))
+
+
+class GalleryNavigationTests(TestCase):
+    """Tests for the previous/next links between photos and videos and their listing."""
+
+    def setUp(self):
+        self.gallery = Page.objects.get(id=1).add_child(
+            instance=GalleryPage(title="Galerie", description="Fotos")
+        )
+        self.newest = self.add_photo("Mond", date(2025, 3, 1))
+        self.video = self.gallery.add_child(
+            instance=VideoPage(title="Sonnenfinsternis", date=date(2025, 2, 1))
+        )
+        self.oldest = self.add_photo("Orion", date(2025, 1, 1))
+
+    def add_photo(self, title, photo_date):
+        return self.gallery.add_child(instance=PhotoPage(title=title, date=photo_date))
+
+    def get_navigation(self, page):
+        context = page.get_context(RequestFactory().get("/"))
+        return context["previous"], context["next"]
+
+    def test_photos_and_videos_are_ordered_by_date(self):
+        """Test that photos and videos are linked newest to oldest."""
+        self.assertEqual(
+            self.get_navigation(self.video),
+            (self.newest.page_ptr, self.oldest.page_ptr),
+        )
+
+    def test_navigation_wraps_around(self):
+        """Test that the first and last items link to each other."""
+        self.assertEqual(self.get_navigation(self.newest)[0], self.oldest.page_ptr)
+        self.assertEqual(self.get_navigation(self.oldest)[1], self.newest.page_ptr)
+
+    def test_same_date_is_ordered_by_id(self):
+        """Test that items of the same day are all reachable."""
+        same_day = self.add_photo("Mars", date(2025, 3, 1))
+        self.assertEqual(self.get_navigation(self.newest)[1], same_day.page_ptr)
+        self.assertEqual(self.get_navigation(same_day)[0], self.newest.page_ptr)
+
+    def test_navigation_costs_one_query_per_link(self):
+        """Test that each link costs one query, wrapping around a second one."""
+        for page, queries in ((self.newest, 3), (self.video, 2), (self.oldest, 3)):
+            with self.assertNumQueries(queries):
+                page._get_adjacent_item(newer=True)
+                page._get_adjacent_item(newer=False)
+
+    def test_navigation_follows_publishing(self):
+        """Test that the links follow published dates, but not drafts."""
+        saturn = self.add_photo("Saturn", date(2024, 12, 1))
+        self.oldest.date = date(2025, 4, 1)
+        self.oldest.save_revision()
+        self.assertEqual(
+            self.get_navigation(self.video),
+            (self.newest.page_ptr, self.oldest.page_ptr),
+        )
+        self.oldest.save_revision().publish()
+        self.assertEqual(
+            self.get_navigation(self.video), (self.newest.page_ptr, saturn.page_ptr)
+        )
+        self.video.unpublish()
+        self.assertEqual(self.get_navigation(self.newest)[1], saturn.page_ptr)
+
+    def test_moved_item_leaves_the_gallery(self):
+        """Test that a photo moved to another gallery is linked there."""
+        other = Page.objects.get(id=1).add_child(
+            instance=GalleryPage(title="Andere Galerie", description="Fotos")
+        )
+        self.video.move(other, pos="last-child")
+        self.assertEqual(self.get_navigation(self.newest)[1], self.oldest.page_ptr)
+        venus = other.add_child(
+            instance=PhotoPage(title="Venus", date=date(2025, 5, 1))
+        )
+        video = VideoPage.objects.get(pk=self.video.pk)
+        self.assertEqual(self.get_navigation(video), (venus.page_ptr, venus.page_ptr))
+
+    def test_single_item_has_no_navigation(self):
+        """Test that a gallery with one item has no previous/next links."""
+        self.video.delete()
+        self.oldest.delete()
+        self.assertEqual(self.get_navigation(self.newest), (None, None))
+
+    def test_gallery_lists_photos_and_videos_by_date(self):
+        """Test that the gallery lists photos and videos newest first."""
+        context = self.gallery.get_context(RequestFactory().get("/"))
+        self.assertEqual(
+            list(context["photos"]), [self.newest, self.video, self.oldest]
+        )
+
+    def test_gallery_is_paginated(self):
+        """Test that a gallery page only lists one chunk of items."""
+        with mock.patch.object(GalleryPage, "items_per_page", 2):
+            context = self.gallery.get_context(RequestFactory().get("/?page=2"))
+        self.assertEqual(list(context["photos"]), [self.oldest])
+        self.assertFalse(context["photos"].has_next())
+
+    def test_load_more_renders_items_only(self):
+        """Test that XMLHttpRequests get the next items without the layout."""
+        request = RequestFactory().get(
+            "/", headers={"x-requested-with": "XMLHttpRequest"}
+        )
+        with mock.patch.object(GalleryPage, "items_per_page", 2):
+            response = self.gallery.serve(request).render()
+        html = response.content.decode()
+        self.assertNotIn("<html", html)
+        self.assertIn("Sonnenfinsternis", html)
+        self.assertIn("X-Requested-With", response["Vary"])
+        self.assertNotIn("Orion", html)
+        self.assertIn('href="?page=2" data-load-more', html)
+
+    def test_gallery_queries_do_not_grow_with_items(self):
+        """Test that listing a gallery with thumbnails costs constant queries."""
+        image = get_image_model().objects.create(
+            title="Mond", file="original_images/mond.png", width=640, height=480
+        )
+        PhotoPage.objects.update(photo=image)
+        # Fill the sidebar cache first
+        self.gallery.get_context(RequestFactory().get("/"))
+        with CaptureQueriesContext(connection) as small_gallery:
+            self.gallery.get_context(RequestFactory().get("/"))
+        for day in range(1, 6):
+            self.gallery.add_child(
+                instance=PhotoPage(title="Mond", date=date(2024, 1, day), photo=image)
+            )
+        with CaptureQueriesContext(connection) as large_gallery:
+            context = self.gallery.get_context(RequestFactory().get("/"))
+            thumbnails = [item.get_thumbnail() for item in context["photos"]]
+        self.assertEqual(len(large_gallery), len(small_gallery))
+        self.assertEqual(thumbnails.count(image), 7)
@@ -0,0 +1,127 @@
+"""
+Tests for the iCalendar feed of the events
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils.timezone import now
+from wagtail.models import Page, PageViewRestriction, Site
+
+from home import ical
+from home.ical import _fold_line
+from home.models import EventPage, EventTypes, HomePage, SingleEvent
+
+
+class EventFeedTests(TestCase):
+    """Tests for building, filtering and caching the event feed."""
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["pages"].clear()
+        root = Page.objects.get(id=1)
+        home = root.add_child(instance=HomePage(title="Start", slug="start"))
+        Site.objects.all().delete()
+        Site.objects.create(hostname="testserver", root_page=home, is_default_site=True)
+        self.events = home.add_child(
+            instance=EventPage(title="Termine", slug="termine")
+        )
+        self.excursions = home.add_child(
+            instance=EventPage(title="Ausflüge", slug="ausfluege")
+        )
+        self.talk = self.add_event(self.events, EventTypes.TALK, "Mondfinsternis")
+        self.observation = self.add_event(
+            self.events, EventTypes.OBSERVE, "Sternschnuppen", cancelled=True
+        )
+        self.excursion = self.add_event(
+            self.excursions, EventTypes.EXCURSION, "Sternwarte", booked_out=True
+        )
+
+    def add_event(self, parent, event_type, event_title, **kwargs):
+        event = parent.add_child(
+            instance=SingleEvent(
+                start_time=now() + timedelta(days=3),
+                event_type=event_type,
+                event_title=event_title,
+                **kwargs,
+            )
+        )
+        event.save_revision().publish()
+        return event
+
+    def get_feed(self, query=""):
+        response = self.client.get(f"/events.ics{query}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        return response.content.decode("utf-8")
+
+    def test_feed_lists_events_with_status(self):
+        """Test that all events are listed with their status and short link."""
+        feed = self.get_feed()
+        self.assertTrue(feed.startswith("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"))
+        self.assertEqual(feed.count("BEGIN:VEVENT"), 3)
+        self.assertIn(f"UID:{self.talk.web_id}@beobachtergruppe.de", feed)
+        self.assertIn(f"URL:https://beobachtergruppe.de/e/{self.talk.web_id}", feed)
+        self.assertIn(
+            "SUMMARY:Beobachtungsabend: Sternschnuppen\r\nSTATUS:CANCELLED", feed
+        )
+        self.assertIn("SUMMARY:Ausflug: Sternwarte (ausgebucht)", feed)
+
+    def test_feed_filters_by_type_and_page(self):
+        """Test that the feed can be limited to event types and an event page."""
+        feed = self.get_feed("?type=talk&type=observe")
+        self.assertIn("Mondfinsternis", feed)
+        self.assertNotIn("Sternwarte", feed)
+
+        feed = self.get_feed(f"?page={self.excursions.pk}")
+        self.assertIn("X-WR-CALNAME:Ausflüge", feed)
+        self.assertEqual(feed.count("BEGIN:VEVENT"), 1)
+
+        self.assertEqual(self.client.get("/events.ics?type=party").status_code, 400)
+        self.assertEqual(self.client.get("/events.ics?page=999").status_code, 404)
+
+    def test_restricted_event_page_is_not_found(self):
+        """Test that the feed of a password protected event page is not served."""
+        PageViewRestriction.objects.create(
+            page=self.excursions,
+            restriction_type=PageViewRestriction.PASSWORD,
+            password="geheim",
+        )
+        response = self.client.get(f"/events.ics?page={self.excursions.pk}")
+        self.assertEqual(response.status_code, 404)
+
+    def test_polling_is_served_from_cache(self):
+        """Test that repeated polls do not query the database."""
+        self.get_feed()
+        with self.assertNumQueries(0):
+            self.get_feed()
+
+    def test_publish_renders_only_changed_event(self):
+        """Test that publishing an event updates the feed incrementally."""
+        self.get_feed()
+        self.talk.cancelled = True
+        with mock.patch.object(
+            ical, "_render_event", wraps=ical._render_event
+        ) as render_event:
+            self.talk.save_revision().publish()
+            feed = self.get_feed()
+        self.assertEqual(
+            [call.args[0].pk for call in render_event.call_args_list], [self.talk.pk]
+        )
+        self.assertIn("SUMMARY:Vortrag: Mondfinsternis\r\nSTATUS:CANCELLED", feed)
+
+    def test_unchanged_feed_returns_304(self):
+        """Test that calendar clients revalidating an unchanged feed get 304."""
+        etag = self.client.get("/events.ics")["ETag"]
+        response = self.client.get("/events.ics", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_long_lines_are_folded(self):
+        """Test that content lines are folded at 75 octets without splitting characters."""
+        line = "DESCRIPTION:" + "ä" * 100
+        folded = _fold_line(line)
+        self.assertEqual(folded.replace("\r\n ", ""), line)
+        for part in folded.split("\r\n"):
+            self.assertLessEqual(len(part.encode("utf-8")), 75)
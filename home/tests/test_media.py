@@ -0,0 +1,87 @@
+"""
+Tests for serving uploaded media files and documents
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from wagtail.documents import get_document_model
+
+
+class MediaServingTests(TestCase):
+    """Tests for the production media view and the document view."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        Path(self.media_root, "video.mp4").write_bytes(b"0123456789" * 100)
+
+    def test_media_has_validators(self):
+        """Test that media files are served with ETag and Last-Modified."""
+        response = self.client.get("/media/video.mp4")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+
+    def test_media_revalidation_returns_304(self):
+        """Test that an unchanged media file is not sent again."""
+        etag = self.client.get("/media/video.mp4")["ETag"]
+        response = self.client.get("/media/video.mp4", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_media_returns_404(self):
+        """Test that missing files are not found."""
+        self.assertEqual(self.client.get("/media/missing.mp4").status_code, 404)
+
+    def test_range_request_returns_partial_content(self):
+        """Test that browsers can request a byte range to seek in videos."""
+        response = self.client.get("/media/video.mp4", headers={"range": "bytes=10-14"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-14/1000")
+        self.assertEqual(response["Content-Length"], "5")
+        self.assertEqual(b"".join(response.streaming_content), b"01234")
+
+    def test_suffix_range_returns_end_of_file(self):
+        """Test that a suffix range returns the last bytes of the file."""
+        response = self.client.get("/media/video.mp4", headers={"range": "bytes=-3"})
+        self.assertEqual(response["Content-Range"], "bytes 997-999/1000")
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+
+    def test_unsatisfiable_range_returns_416(self):
+        """Test that a range after the end of the file is rejected."""
+        response = self.client.get("/media/video.mp4", headers={"range": "bytes=1000-"})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1000")
+
+    def test_outdated_if_range_returns_whole_file(self):
+        """Test that a range of a changed file is answered with the whole file."""
+        response = self.client.get(
+            "/media/video.mp4",
+            headers={"range": "bytes=10-14", "if-range": '"outdated"'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], "1000")
+
+    @override_settings(MEDIA_ACCEL_REDIRECT="/protected-media/")
+    def test_accel_redirect_leaves_file_to_proxy(self):
+        """Test that nginx is asked to send the file when configured."""
+        response = self.client.get("/media/video.mp4")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/video.mp4")
+        self.assertEqual(response.content, b"")
+
+    def test_document_revalidation_returns_304(self):
+        """Test that documents without a stored file hash get an ETag."""
+        document = get_document_model().objects.create(
+            title="Satzung", file=ContentFile(b"%PDF-1.4", name="satzung.pdf")
+        )
+        url = document.url
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
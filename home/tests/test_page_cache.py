@@ -0,0 +1,128 @@
+"""
+Tests for the full-page cache for anonymous visitors
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.timezone import now
+from wagtail.models import Page, PageViewRestriction, Site
+
+from home.models import EventPage, EventTypes, HomePage, SingleEvent
+from home.page_cache import limit_cache_validity, store_response
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    """Tests for storing and purging cached pages."""
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["pages"].clear()
+        root = Page.objects.get(id=1)
+        self.home = root.add_child(instance=HomePage(title="Start", slug="start"))
+        Site.objects.all().delete()
+        Site.objects.create(
+            hostname="testserver", root_page=self.home, is_default_site=True
+        )
+        self.events = self.home.add_child(
+            instance=EventPage(title="Termine", slug="termine")
+        )
+        self.other = self.home.add_child(
+            instance=HomePage(title="Verein", slug="verein")
+        )
+
+    def test_second_request_is_served_from_cache(self):
+        """Test that an anonymous page view is stored and then reused."""
+        self.assertEqual(self.client.get("/verein/")["X-Page-Cache"], "miss")
+        self.assertEqual(self.client.get("/verein/")["X-Page-Cache"], "hit")
+
+    def test_authenticated_users_bypass_cache(self):
+        """Test that pages rendered for editors are never stored or served."""
+        user = get_user_model().objects.create_user("editor", password="secret")
+        self.client.force_login(user)
+        self.client.get("/verein/")
+        self.assertNotIn("X-Page-Cache", self.client.get("/verein/"))
+
+    def test_publish_purges_page(self):
+        """Test that publishing a page serves the new content."""
+        self.client.get("/verein/")
+        self.other.title = "Der Verein"
+        self.other.save_revision().publish()
+        response = self.client.get("/verein/")
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "<title>Der Verein</title>")
+
+    def test_event_publish_purges_every_page(self):
+        """Test that a new event shows up in the sidebar of unrelated pages."""
+        self.client.get("/verein/")
+        event = self.events.add_child(
+            instance=SingleEvent(
+                event_title="Sternbilder",
+                start_time=now() + timedelta(days=3),
+                event_type=EventTypes.TALK,
+                referent="Dr. Stern",
+            )
+        )
+        event.save_revision().publish()
+        response = self.client.get("/verein/")
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Sternbilder")
+
+    def test_cache_expires_when_listed_event_starts(self):
+        """Test that pages listing an event are only cached until it starts."""
+        start_time = now() + timedelta(minutes=10)
+        event = self.events.add_child(
+            instance=SingleEvent(
+                event_title="Sternbilder",
+                start_time=start_time,
+                event_type=EventTypes.TALK,
+                referent="Dr. Stern",
+            )
+        )
+        event.save_revision().publish()
+        with mock.patch.object(caches["pages"], "set") as cache_set:
+            self.client.get("/verein/")
+        self.assertLessEqual(cache_set.call_args.kwargs["timeout"], 600)
+
+    def test_expired_response_is_not_stored(self):
+        """Test that a response already outdated while rendering is not cached."""
+        request = RequestFactory().get("/verein/")
+        limit_cache_validity(request, now() + timedelta(hours=2))
+        limit_cache_validity(request, now() - timedelta(seconds=1))
+        limit_cache_validity(request, now() + timedelta(hours=1))
+        store_response(request, self.other.pk, mock.Mock())
+        self.assertEqual(self.client.get("/verein/")["X-Page-Cache"], "miss")
+
+    def test_revalidation_returns_304(self):
+        """Test that an unchanged cached page is answered with 304 Not Modified."""
+        etag = self.client.get("/verein/")["ETag"]
+        response = self.client.get("/verein/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_on_publish(self):
+        """Test that publishing a page invalidates its ETag."""
+        etag = self.client.get("/verein/")["ETag"]
+        self.other.save_revision().publish()
+        response = self.client.get("/verein/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_view_restriction_purges_pages(self):
+        """Test that adding or removing a view restriction purges the cache."""
+        self.client.get("/verein/")
+        restriction = PageViewRestriction.objects.create(
+            page=self.other,
+            restriction_type=PageViewRestriction.PASSWORD,
+            password="geheim",
+        )
+        response = self.client.get("/verein/")
+        self.assertNotEqual(response.get("X-Page-Cache"), "hit")
+        self.assertNotContains(response, "<title>Verein</title>")
+        restriction.delete()
+        response = self.client.get("/verein/")
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "<title>Verein</title>")
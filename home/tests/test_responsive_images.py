@@ -0,0 +1,240 @@
+"""
+Tests for responsive image renditions
+"""
+
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import (
+    get_test_image_file,
+    get_test_image_file_jpeg,
+)
+from wagtail.models import Page
+
+from home.models import GalleryIndexPage, GalleryPage, HomePage, PhotoPage
+from home.renditions import IMAGE_PRESETS, generate_renditions, get_filter_specs
+from home.sidebar import SIDEBAR_ICON_FILTER
+
+
+class RenditionTestCase(TestCase):
+    """Base class storing images in a temporary media directory."""
+
+    def setUp(self):
+        # Wagtail caches renditions by image ID, which is reused between tests
+        caches["default"].clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ResponsiveImageTagTests(RenditionTestCase):
+    """Tests for the responsive_image template tag."""
+
+    def render(self, image, preset_name):
+        template = Template(
+            "{% load responsive_images %}"
+            '{% responsive_image image preset_name class="is-fullwidth" %}'
+        )
+        return template.render(Context({"image": image, "preset_name": preset_name}))
+
+    def create_image(self, width, height, get_file=get_test_image_file):
+        return get_image_model().objects.create(
+            title="Andromeda", file=get_file(size=(width, height))
+        )
+
+    def test_srcset_lists_preset_widths(self):
+        """Test that a large image is offered in all widths of its preset."""
+        html = self.render(self.create_image(3000, 2000), "card")
+        for width in IMAGE_PRESETS["card"].widths:
+            self.assertIn(f".width-{width}.format-png.png {width}w", html)
+        self.assertIn(f'sizes="{IMAGE_PRESETS["card"].sizes}"', html)
+        self.assertIn('class="is-fullwidth"', html)
+        self.assertIn('width="320"', html)
+
+    def test_picture_offers_modern_formats(self):
+        """Test that AVIF and WebP sources come before the JPEG fallback."""
+        html = self.render(
+            self.create_image(800, 600, get_test_image_file_jpeg), "card"
+        )
+        self.assertTrue(html.startswith("<picture>"))
+        self.assertLess(
+            html.index('type="image/avif"'), html.index('type="image/webp"')
+        )
+        self.assertIn('src="/media/images/test.width-320.format-jpeg.jpg"', html)
+
+    def test_small_image_is_not_listed_repeatedly(self):
+        """Test that widths larger than the original image are left out."""
+        html = self.render(self.create_image(400, 300), "card")
+        self.assertEqual(html.count(" 400w"), 3)
+
+    def test_missing_image_renders_nothing(self):
+        """Test that an empty image field renders nothing."""
+        self.assertEqual(self.render(None, "card"), "")
+
+
+class RenditionPregenerationTests(RenditionTestCase):
+    """Tests for creating renditions ahead of the first page view."""
+
+    def create_image(self):
+        return get_image_model().objects.create(
+            title="Orion", file=get_test_image_file(size=(200, 150))
+        )
+
+    def test_upload_creates_card_renditions(self):
+        """Test that an uploaded image is rendered for cards right away."""
+        with self.captureOnCommitCallbacks(execute=True):
+            image = self.create_image()
+        self.assertEqual(
+            set(image.renditions.values_list("filter_spec", flat=True)),
+            set(get_filter_specs(image, ["card"])),
+        )
+
+    def test_publish_creates_photo_renditions(self):
+        """Test that publishing a photo renders it for the photo page."""
+        image = self.create_image()
+        gallery = Page.objects.get(id=1).add_child(
+            instance=GalleryPage(title="Galerie", description="Fotos")
+        )
+        photo_page = gallery.add_child(
+            instance=PhotoPage(title="Orion", photo=image, date=date(2025, 1, 1))
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            photo_page.save_revision().publish()
+        self.assertEqual(
+            image.renditions.count(),
+            len(get_filter_specs(image, ["card", "content"])),
+        )
+
+    def test_backfill_command_creates_missing_renditions(self):
+        """Test that the backfill command renders existing images."""
+        image = self.create_image()
+        call_command("backfill_renditions", processes=1, stdout=StringIO())
+        self.assertEqual(
+            image.renditions.count(), len(get_filter_specs(image, ["card"]))
+        )
+
+    def test_backfill_command_renders_page_images(self):
+        """Test that images in StreamFields and sidebar icons are rendered."""
+        image = self.create_image()
+        icon = self.create_image()
+        Page.objects.get(id=1).add_child(
+            instance=HomePage(
+                title="Start",
+                sidebar_icon=icon,
+                body=[
+                    (
+                        "image_with_caption",
+                        {"image": image, "caption_position": "left"},
+                    )
+                ],
+            )
+        )
+        call_command("backfill_renditions", processes=1, stdout=StringIO())
+        self.assertEqual(
+            image.renditions.count(), len(get_filter_specs(image, ["card", "caption"]))
+        )
+        self.assertTrue(
+            icon.renditions.filter(filter_spec=SIDEBAR_ICON_FILTER).exists()
+        )
+
+    def test_backfill_command_replaces_missing_files(self):
+        """Test that renditions whose file is missing after a restore are recreated."""
+        image = self.create_image()
+        call_command("backfill_renditions", processes=1, stdout=StringIO())
+        rendition = image.renditions.first()
+        rendition.file.storage.delete(rendition.file.name)
+        call_command("backfill_renditions", processes=1, stdout=StringIO())
+        rendition = image.renditions.get(filter_spec=rendition.filter_spec)
+        self.assertTrue(rendition.file.storage.exists(rendition.file.name))
+
+    def test_backfill_command_skips_corrupt_images(self):
+        """Test that an unreadable original is reported and the others rendered."""
+        corrupt = self.create_image()
+        with corrupt.file.storage.open(corrupt.file.name, "wb") as file:
+            file.write(b"not an image")
+        image = self.create_image()
+        stderr = StringIO()
+        call_command(
+            "backfill_renditions", processes=1, stdout=StringIO(), stderr=stderr
+        )
+        self.assertIn(f"Image {corrupt.pk}: cannot be rendered", stderr.getvalue())
+        self.assertEqual(
+            image.renditions.count(), len(get_filter_specs(image, ["card"]))
+        )
+
+
+class GalleryRenditionPrefetchTests(RenditionTestCase):
+    """Tests for loading the renditions of gallery listings in bulk."""
+
+    def setUp(self):
+        super().setUp()
+        # Look up renditions in the database instead of Wagtail's cache
+        cache_override = override_settings(
+            CACHES={
+                **settings.CACHES,
+                "renditions": {
+                    "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                },
+            }
+        )
+        cache_override.enable()
+        self.addCleanup(cache_override.disable)
+        self.index = Page.objects.get(id=1).add_child(
+            instance=GalleryIndexPage(title="Galerien", description="Alle")
+        )
+        self.gallery = self.add_gallery()
+
+    def add_gallery(self):
+        return self.index.add_child(
+            instance=GalleryPage(
+                title="Galerie", description="Fotos", cover_image=self.create_image()
+            )
+        )
+
+    def add_photo(self):
+        return self.gallery.add_child(
+            instance=PhotoPage(
+                title="Orion", photo=self.create_image(), date=date(2025, 1, 1)
+            )
+        )
+
+    def create_image(self):
+        image = get_image_model().objects.create(
+            title="Orion", file=get_test_image_file(size=(200, 150))
+        )
+        generate_renditions(image, ["card"])
+        return image
+
+    def count_queries(self, page):
+        # Render once to fill the caches emptied by adding pages
+        page.serve(RequestFactory().get("/")).render()
+        with CaptureQueriesContext(connection) as queries:
+            page.serve(RequestFactory().get("/")).render()
+        return len(queries)
+
+    def test_gallery_queries_do_not_grow_with_photos(self):
+        """Test that thumbnails and their renditions are loaded in bulk."""
+        self.add_photo()
+        one_photo = self.count_queries(self.gallery)
+        self.add_photo()
+        self.add_photo()
+        self.assertEqual(self.count_queries(self.gallery), one_photo)
+
+    def test_gallery_index_queries_do_not_grow_with_galleries(self):
+        """Test that cover images and their renditions are loaded in bulk."""
+        one_gallery = self.count_queries(self.index)
+        self.add_gallery()
+        self.add_gallery()
+        self.assertEqual(self.count_queries(self.index), one_gallery)
@@ -0,0 +1,321 @@
+"""
+Tests for the site search
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from wagtail.models import Page, PageViewRestriction, Site
+from wagtail.search.models import IndexEntry
+
+from home.models import (
+    EventPage,
+    EventTypes,
+    GalleryPage,
+    HomePage,
+    PhotoPage,
+    SingleEvent,
+)
+from search import documents, result_cache, suggestions
+from search.documents import SearchFilters
+from search.result_cache import clear_search_results
+from search.suggestions import clear_suggestions
+
+
+class SearchTestCase(TestCase):
+    """Base class creating a site with an event page."""
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["pages"].clear()
+        clear_search_results()
+        clear_suggestions()
+        root = Page.objects.get(id=1)
+        home = root.add_child(
+            instance=HomePage(
+                title="Start",
+                slug="start",
+                body=[("paragraph", "<p>Treffpunkt auf der Museumsinsel</p>")],
+            )
+        )
+        Site.objects.all().delete()
+        Site.objects.create(hostname="testserver", root_page=home, is_default_site=True)
+        self.home = home
+        self.events = home.add_child(
+            instance=EventPage(title="Termine", slug="termine")
+        )
+
+    def add_event(self, event_title, **kwargs):
+        kwargs.setdefault("start_time", now() + timedelta(days=3))
+        kwargs.setdefault("event_type", EventTypes.TALK)
+        event = self.events.add_child(
+            instance=SingleEvent(event_title=event_title, **kwargs)
+        )
+        event.save_revision().publish()
+        return event
+
+    def search(self, query):
+        response = self.client.get("/search/", {"query": query})
+        self.assertEqual(response.status_code, 200)
+        return [page.specific for page in response.context["search_results"]]
+
+
+class SearchTests(SearchTestCase):
+    """Tests for the indexed fields of pages and events."""
+
+    def test_events_are_found_by_referent_and_abstract(self):
+        """Test that events are found by their speaker and summary."""
+        event = self.add_event(
+            "Mondfinsternis",
+            referent="Dr. Kepler",
+            abstract="<p>Über die Bahnen der Planeten</p>",
+        )
+        self.assertEqual(self.search("Kepler"), [event])
+        self.assertEqual(self.search("Planeten"), [event])
+
+    def test_pages_are_found_by_body_text(self):
+        """Test that the text of StreamField blocks is searched."""
+        self.assertEqual(self.search("Museumsinsel"), [self.home])
+
+    def test_event_title_ranks_above_abstract(self):
+        """Test that a match in the event title outranks one in the summary."""
+        mentioned = self.add_event(
+            "Sternwarte", abstract="<p>Mit Blick auf den Saturn</p>"
+        )
+        about = self.add_event("Saturn")
+        self.assertEqual(self.search("Saturn"), [about, mentioned])
+
+    def test_restricted_pages_are_not_found(self):
+        """Test that pages with a view restriction are not listed."""
+        self.add_event("Mondfinsternis", referent="Dr. Kepler")
+        PageViewRestriction.objects.create(
+            page=self.events,
+            restriction_type=PageViewRestriction.PASSWORD,
+            password="geheim",
+        )
+        self.assertEqual(self.search("Kepler"), [])
+        self.assertEqual(self.search("Museumsinsel"), [self.home])
+
+    def test_reindex_command_rebuilds_index(self):
+        """Test that the reindex command indexes all pages and reports progress."""
+        event = self.add_event("Mondfinsternis", referent="Dr. Kepler")
+        IndexEntry.objects.all().delete()
+        self.assertEqual(self.search("Kepler"), [])
+        stdout = StringIO()
+        call_command("reindex_search", processes=1, chunk_size=1, stdout=stdout)
+        self.assertEqual(self.search("Kepler"), [event])
+        output = stdout.getvalue()
+        self.assertIn("Indexing 5 objects in 5 chunks", output)
+        self.assertIn("home.SingleEvent: 1 indexed", output)
+        self.assertIn("[5/5] ", output)
+
+
+class FacetedSearchTests(SearchTestCase):
+    """Tests for filtering the results by type and date and counting them."""
+
+    def setUp(self):
+        super().setUp()
+        self.gallery = self.events.add_child(
+            instance=GalleryPage(title="Galerie", description="Fotos")
+        )
+        self.photo = self.gallery.add_child(
+            instance=PhotoPage(
+                title="Jupiter über Garching",
+                author="Johannes Kepler",
+                date=date(2024, 8, 1),
+            )
+        )
+        self.talk = self.add_event("Jupiter", start_time=now() + timedelta(days=3))
+        self.observation = self.add_event(
+            "Jupiter am Teleskop",
+            event_type=EventTypes.OBSERVE,
+            start_time=now() + timedelta(days=4),
+        )
+
+    def get_context(self, query):
+        response = self.client.get("/search/", query)
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    def test_results_are_specific_pages(self):
+        """Test that results are returned as their page types."""
+        results = list(self.get_context({"query": "Kepler"})["search_results"])
+        self.assertEqual(results, [self.photo])
+        self.assertIsInstance(results[0], PhotoPage)
+
+    def test_facets_count_results(self):
+        """Test that the results are counted per type, event type and year."""
+        facets = self.get_context({"query": "Jupiter", "event_type": "talk"})["facets"]
+        self.assertEqual(
+            [(link["label"], link["count"]) for link in facets["document_types"]],
+            [("Veranstaltungen", 1)],
+        )
+        # The chosen event type does not hide the other ones
+        self.assertEqual(
+            [(link["label"], link["count"]) for link in facets["event_types"]],
+            [("Vortrag", 1), ("Beobachtungsabend", 1)],
+        )
+        self.assertTrue(facets["event_types"][0]["active"])
+        self.assertNotIn("event_type", facets["event_types"][0]["url"])
+
+    def test_filters_by_type_and_date_range(self):
+        """Test that results can be limited to a type and a date range."""
+        results = self.get_context({"query": "Jupiter", "type": "photo"})[
+            "search_results"
+        ]
+        self.assertEqual(list(results), [self.photo])
+        results = self.get_context(
+            {"query": "Jupiter", "from": "2024-01-01", "to": "2024-12-31"}
+        )["search_results"]
+        self.assertEqual(list(results), [self.photo])
+        for query in ({"type": "party"}, {"event_type": "party"}, {"from": "2024"}):
+            response = self.client.get("/search/", {"query": "Jupiter", **query})
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_facets_are_counted_in_one_query(self):
+        """Test that all facets come from one query, each with the other filters."""
+        pages = Page.objects.live().public()
+        filters = SearchFilters(
+            document_types=frozenset({"event"}), date_to=date(2024, 12, 31)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            facets = documents._get_facets(pages, "Jupiter", filters)
+        searches = [query for query in queries if "indexentry" in query["sql"]]
+        self.assertEqual(len(searches), 1)
+        self.assertEqual(facets.document_types, {"photo": 1})
+        self.assertEqual(facets.event_types, {})
+        years = Counter(
+            event.start_time.year for event in (self.talk, self.observation)
+        )
+        self.assertEqual(facets.years, dict(years))
+
+    def test_queries_do_not_grow_with_results(self):
+        """Test that results and facets do not need a query per result."""
+
+        def count_queries(results):
+            # Search once to fill the caches emptied by publishing events
+            self.client.get("/search/", {"query": "Jupiter"})
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/search/", {"query": "Jupiter"})
+            self.assertEqual(len(response.context["search_results"]), results)
+            return len(queries)
+
+        three_results = count_queries(3)
+        self.add_event("Jupiter und seine Monde", start_time=now() + timedelta(days=5))
+        self.add_event("Die Ringe des Jupiter", start_time=now() + timedelta(days=6))
+        self.assertEqual(count_queries(5), three_results)
+
+
+class SearchResultCacheTests(SearchTestCase):
+    """Tests for reusing the results of repeated searches."""
+
+    def setUp(self):
+        super().setUp()
+        for number in range(12):
+            self.add_event(f"Venus {number}")
+        patcher = mock.patch.object(result_cache, "search", wraps=result_cache.search)
+        self.search_pages = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeated_searches_are_cached(self):
+        """Test that other pages of a search repeated in other case reuse it."""
+        self.client.get("/search/", {"query": "Venus"})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/search/", {"query": " VENUS ", "page": 2})
+        self.assertNotIn(
+            "wagtailsearch_indexentry", " ".join(query["sql"] for query in queries)
+        )
+        self.assertEqual(len(response.context["search_results"]), 2)
+        self.assertEqual(response.context["search_results"].paginator.count, 12)
+        self.assertEqual(self.search_pages.call_count, 1)
+
+    def test_publishing_invalidates_results(self):
+        """Test that newly published pages are found right away."""
+        self.search("Venus")
+        self.add_event("Venus im Morgenhimmel")
+        response = self.client.get("/search/", {"query": "Venus"})
+        self.assertEqual(response.context["search_results"].paginator.count, 13)
+
+    def test_least_recently_used_searches_are_dropped(self):
+        """Test that the number of cached searches is bounded."""
+        with mock.patch.object(result_cache, "SEARCH_RESULTS_MAX_ENTRIES", 2):
+            for query in ("Venus", "Mars", "Venus", "Saturn", "Venus", "Mars"):
+                self.search(query)
+        self.assertEqual(
+            [call.args[0] for call in self.search_pages.call_args_list],
+            ["venus", "mars", "saturn", "mars"],
+        )
+
+
+class SuggestionTests(SearchTestCase):
+    """Tests for suggesting titles, speakers and event types while typing."""
+
+    def setUp(self):
+        super().setUp()
+        self.add_event("Keplers Gesetze", referent="Dr. Johannes Kepler")
+        self.add_event("Planetenbahnen", referent="Dr. Johannes Kepler")
+        self.add_event("Kometen", referent="Kerstin Keller")
+
+    def suggest(self, query):
+        response = self.client.get("/search/suggest/", {"query": query})
+        self.assertEqual(response.status_code, 200)
+        return [
+            (suggestion["text"], suggestion["kind"])
+            for suggestion in response.json()["suggestions"]
+        ]
+
+    def test_words_are_matched_by_prefix(self):
+        """Test that every word of a suggestion can be typed, frequent ones first."""
+        self.assertEqual(
+            self.suggest("ke"),
+            [
+                ("Dr. Johannes Kepler", "speaker"),
+                ("Keplers Gesetze", "title"),
+                ("Kerstin Keller", "speaker"),
+            ],
+        )
+        self.assertEqual(self.suggest("joh KEP"), [("Dr. Johannes Kepler", "speaker")])
+        self.assertEqual(self.suggest("vortr"), [("Vortrag", "event_type")])
+        self.assertEqual(self.suggest("k"), [])
+
+    def test_suggestions_do_not_query_the_database(self):
+        """Test that suggestions are looked up in memory once the tree is built."""
+        self.suggest("ke")
+        with self.assertNumQueries(0):
+            self.suggest("kom")
+
+    def test_restricted_pages_are_not_suggested(self):
+        """Test that titles and speakers of restricted pages are not suggested."""
+        PageViewRestriction.objects.create(
+            page=self.events,
+            restriction_type=PageViewRestriction.PASSWORD,
+            password="geheim",
+        )
+        self.assertEqual(self.suggest("ke"), [])
+
+    def test_suggestions_expire(self):
+        """Test that the tree is rebuilt after a while, e.g. for other processes."""
+        self.suggest("ke")
+        loaded_at = suggestions.monotonic()
+        with mock.patch.object(
+            suggestions,
+            "monotonic",
+            return_value=loaded_at + suggestions.SUGGESTIONS_TTL + 1,
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                self.suggest("kom")
+        self.assertTrue(queries)
+
+    def test_publishing_rebuilds_suggestions(self):
+        """Test that newly published events are suggested right away."""
+        self.suggest("ke")
+        self.add_event("Kernfusion in Sternen")
+        self.assertIn(("Kernfusion in Sternen", "title"), self.suggest("kern"))
@@ -0,0 +1,177 @@
+"""
+Tests for the cached sidebar of promoted pages
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction, Site
+
+from home.models import EventPage, EventTypes, GalleryIndexPage, HomePage, SingleEvent
+from home.sidebar import get_sidebar_links, get_upcoming_events
+
+
+class SidebarCacheTests(TestCase):
+    """Tests for building and invalidating the cached sidebar."""
+
+    def setUp(self):
+        cache.clear()
+        root = Page.objects.get(id=1)
+        self.home = root.add_child(instance=HomePage(title="Start", slug="start"))
+        self.site = Site.objects.create(
+            hostname="testserver", root_page=self.home, is_default_site=True
+        )
+        self.promoted = self.home.add_child(
+            instance=HomePage(
+                title="Verein",
+                slug="verein",
+                show_in_sidebar=True,
+                sidebar_text="Über uns",
+            )
+        )
+
+    def test_promoted_page_is_listed(self):
+        """Test that a live page with show_in_sidebar=True is listed."""
+        links = get_sidebar_links(self.site)
+        self.assertEqual([link.text for link in links], ["Über uns"])
+        self.assertEqual(links[0].url, "/verein/")
+
+    def test_sidebar_is_served_from_cache(self):
+        """Test that a second lookup does not hit the database."""
+        get_sidebar_links(self.site)
+        with self.assertNumQueries(0):
+            get_sidebar_links(self.site)
+
+    def test_unpublish_invalidates_sidebar(self):
+        """Test that unpublishing a promoted page removes it from the sidebar."""
+        get_sidebar_links(self.site)
+        self.promoted.unpublish()
+        self.assertEqual(get_sidebar_links(self.site), [])
+
+    def test_publish_invalidates_sidebar(self):
+        """Test that publishing a changed sidebar text updates the sidebar."""
+        get_sidebar_links(self.site)
+        self.promoted.sidebar_text = "Der Verein"
+        self.promoted.save_revision().publish()
+        self.assertEqual(get_sidebar_links(self.site)[0].text, "Der Verein")
+
+    def test_view_restriction_invalidates_sidebar(self):
+        """Test that a page made private is removed from the sidebar."""
+        get_sidebar_links(self.site)
+        restriction = PageViewRestriction.objects.create(
+            page=self.promoted,
+            restriction_type=PageViewRestriction.PASSWORD,
+            password="geheim",
+        )
+        self.assertEqual(get_sidebar_links(self.site), [])
+        restriction.delete()
+        self.assertEqual(len(get_sidebar_links(self.site)), 1)
+
+    def test_only_saving_a_sidebar_icon_invalidates_sidebar(self):
+        """Test that saving an image only rebuilds the sidebar if it is an icon."""
+        icon, other = (
+            get_image_model().objects.create(
+                title=title, file=f"original_images/{title}.png", width=48, height=48
+            )
+            for title in ("icon", "other")
+        )
+        self.promoted.sidebar_icon = icon
+        self.promoted.save_revision().publish()
+        get_sidebar_links(self.site)
+        other.save()
+        with self.assertNumQueries(0):
+            get_sidebar_links(self.site)
+        icon.save()
+        with CaptureQueriesContext(connection) as queries:
+            get_sidebar_links(self.site)
+        self.assertTrue(queries)
+
+    def test_rebuild_query_count_is_constant(self):
+        """Test that rebuilding the sidebar does not query once per promoted page."""
+        with CaptureQueriesContext(connection) as single_page_queries:
+            get_sidebar_links(self.site)
+
+        self.home.add_child(
+            instance=EventPage(title="Termine", slug="termine", show_in_sidebar=True)
+        )
+        self.home.add_child(
+            instance=GalleryIndexPage(
+                title="Galerie",
+                slug="galerie",
+                description="<p>Fotos</p>",
+                show_in_sidebar=True,
+            )
+        )
+        cache.clear()
+        with self.assertNumQueries(len(single_page_queries)):
+            links = get_sidebar_links(self.site)
+        self.assertEqual(len(links), 3)
+
+
+class UpcomingEventsCacheTests(TestCase):
+    """Tests for the cached upcoming events of the sidebar."""
+
+    def setUp(self):
+        cache.clear()
+        root = Page.objects.get(id=1)
+        self.home = root.add_child(instance=HomePage(title="Start", slug="start"))
+        Site.objects.all().delete()
+        self.site = Site.objects.create(
+            hostname="testserver", root_page=self.home, is_default_site=True
+        )
+        self.events = self.home.add_child(
+            instance=EventPage(title="Termine", slug="termine")
+        )
+        self.event = self.add_event(days=3, event_title="Mondfinsternis")
+
+    def add_event(self, days, **kwargs):
+        return self.events.add_child(
+            instance=SingleEvent(
+                start_time=now() + timedelta(days=days),
+                event_type=EventTypes.TALK,
+                **kwargs,
+            )
+        )
+
+    def test_event_links_to_its_event_page(self):
+        """Test that events carry the URL of their parent page and their anchor."""
+        events = get_upcoming_events(self.site)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].parent_url, "/termine/")
+        self.assertEqual(events[0].web_id, self.event.web_id)
+        self.assertEqual(events[0].event_title, "Mondfinsternis")
+
+    def test_events_are_served_from_cache(self):
+        """Test that a second lookup does not hit the database."""
+        get_upcoming_events(self.site)
+        with self.assertNumQueries(0):
+            get_upcoming_events(self.site)
+
+    def test_publish_invalidates_events(self):
+        """Test that a newly published event shows up in the sidebar."""
+        get_upcoming_events(self.site)
+        event = self.add_event(days=1, event_title="Sternschnuppen")
+        event.save_revision().publish()
+        self.assertEqual(
+            [event.event_title for event in get_upcoming_events(self.site)],
+            ["Sternschnuppen", "Mondfinsternis"],
+        )
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_sidebar_queries_do_not_grow_with_events(self):
+        """Test that event pages are not looked up once per listed event."""
+        self.client.get("/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/")
+        single_event_queries = len(queries)
+
+        self.add_event(days=5, event_title="Saturn")
+        self.client.get("/")
+        with self.assertNumQueries(single_event_queries):
+            response = self.client.get("/")
+        self.assertContains(response, f'href="/termine/#event-{self.event.web_id}"')
@@ -0,0 +1,75 @@
+"""
+Tests for the background task backend
+"""
+
+import threading
+
+from django.test import TestCase
+from django_tasks import task
+from django_tasks.base import TaskResultStatus
+
+from home.task_backend import BackgroundThreadBackend
+
+calls = []
+release_worker = threading.Event()
+
+
+@task()
+def record_call(value):
+    calls.append(value)
+
+
+@task()
+def block_worker():
+    release_worker.wait(timeout=5)
+
+
+@task()
+def fail():
+    raise ValueError("Broken task")
+
+
+class BackgroundThreadBackendTests(TestCase):
+    """Tests for running tasks in a thread after the transaction commits."""
+
+    def setUp(self):
+        calls.clear()
+        release_worker.clear()
+        self.backend = BackgroundThreadBackend("background", {})
+
+    def enqueue(self, task, *args):
+        return self.backend.enqueue(task, args, {})
+
+    def test_tasks_run_after_commit(self):
+        """Test that tasks wait for the transaction and then run in a thread."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            result = self.enqueue(record_call, 1)
+        self.assertEqual(calls, [])
+        for callback in callbacks:
+            callback()
+        self.backend.shutdown()
+        self.assertEqual(calls, [1])
+        self.assertEqual(result.status, TaskResultStatus.SUCCESSFUL)
+
+    def test_repeated_tasks_are_coalesced(self):
+        """Test that a task enqueued repeatedly with equal arguments runs once."""
+        with self.captureOnCommitCallbacks(execute=True):
+            # Keep the only worker busy while the other tasks are submitted
+            self.enqueue(block_worker)
+            for value in (1, 2, 1, 1, 2):
+                self.enqueue(record_call, value)
+        release_worker.set()
+        self.backend.shutdown()
+        self.assertEqual(calls, [1, 2])
+
+    def test_failing_task_is_recorded(self):
+        """Test that an exception marks the result as failed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            # Hold the task back until the log is captured
+            self.enqueue(block_worker)
+            result = self.enqueue(fail)
+        with self.assertLogs("django_tasks", "ERROR"):
+            release_worker.set()
+            self.backend.shutdown()
+        self.assertEqual(result.status, TaskResultStatus.FAILED)
+        self.assertEqual(result.errors[0].exception_class, ValueError)
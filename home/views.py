@@ -0,0 +1,190 @@
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.utils.timezone import now
+from django.views.decorators.http import require_safe
+from wagtail.models import Page
+
+from home.ical import get_feed
+from home.models import EventPage, EventTypes, SingleEvent
+
+
+@require_safe
+def event_redirect(request, web_id: str):
+    """
+    Redirect the short link /e/<web_id> of an event to its card on the page
+    listing it. The event page is looked up by its tree path, so no ancestors
+    are walked whatever the depth of the page tree.
+    """
+    event = get_object_or_404(
+        SingleEvent.objects.live().public().only("path"), web_id=web_id
+    )
+    parent = get_object_or_404(
+        Page.objects.live(), path=event.path[: -SingleEvent.steplen]
+    )
+    url = parent.get_url(request)
+    if url is None:
+        raise Http404("Event page not routable")
+    return redirect(f"{url}#event-{web_id}")
+
+
+EVENTS_API_PAGE_SIZE = 20
+EVENTS_API_MAX_PAGE_SIZE = 100
+# Columns read by the events API, all others are deferred
+EVENTS_API_FIELDS = (
+    "web_id",
+    "start_time",
+    "event_type",
+    "event_title",
+    "referent",
+    "location",
+    "cancelled",
+    "booked_out",
+    "needs_reservation",
+    "reservation_date",
+)
+
+
+def _get_event_types(request) -> list[str]:
+    """Return the EventTypes named by ?type=, raising KeyError for unknown ones."""
+    return [EventTypes[name.upper()].value for name in request.GET.getlist("type")]
+
+
+def _conditional_response(
+    request, content: str, content_type: str, max_age: int
+) -> HttpResponse:
+    """Answer with 304 Not Modified if the client has the content already."""
+    etag = quote_etag(
+        hashlib.md5(content.encode("utf-8"), usedforsecurity=False).hexdigest()
+    )
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=content_type)
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+def _encode_cursor(event: SingleEvent) -> str:
+    position = f"{event.start_time.isoformat()}|{event.pk}"
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Return the position encoded in a cursor, raising ValueError if it is invalid."""
+    try:
+        position = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    start_time, _, pk = position.partition("|")
+    return datetime.fromisoformat(start_time), int(pk)
+
+
+@require_safe
+def event_feed(request):
+    """
+    Serve the events as an iCalendar feed for calendar subscriptions.
+
+    ?type=<name> (repeatable, e.g. type=talk&type=observe) limits the feed to
+    some event types and ?page=<id> to the events of one EventPage.
+    """
+    try:
+        event_types = _get_event_types(request)
+    except KeyError:
+        return HttpResponseBadRequest("Unknown event type")
+    parent_id = request.GET.get("page")
+    if parent_id is not None and not parent_id.isdigit():
+        return HttpResponseBadRequest("Invalid page")
+
+    try:
+        feed = get_feed(int(parent_id) if parent_id else None, event_types)
+    except EventPage.DoesNotExist:
+        raise Http404("Event page not found") from None
+
+    return _conditional_response(
+        request, feed, "text/calendar; charset=utf-8", max_age=300
+    )
+
+
+@require_safe
+def events_api(request):
+    """
+    List the upcoming events as JSON for partner sites and apps.
+
+    Events are ordered by start time and paginated with an opaque cursor:
+    each response links to the next page, which continues after the last
+    event shown, so pages stay consistent while events are added. ?limit=
+    sets the page size and ?type= filters like the calendar feed.
+    """
+    try:
+        event_types = _get_event_types(request)
+        limit = int(request.GET.get("limit", EVENTS_API_PAGE_SIZE))
+        cursor = request.GET.get("cursor")
+        position = _decode_cursor(cursor) if cursor else None
+    except KeyError:
+        return HttpResponseBadRequest("Unknown event type")
+    except ValueError:
+        return HttpResponseBadRequest("Invalid limit or cursor")
+    if not 1 <= limit <= EVENTS_API_MAX_PAGE_SIZE:
+        return HttpResponseBadRequest("Invalid limit")
+
+    events = (
+        SingleEvent.objects.live()
+        .public()
+        .filter(start_time__gte=now())
+        .only(*EVENTS_API_FIELDS)
+        .order_by("start_time", "pk")
+    )
+    if event_types:
+        events = events.filter(event_type__in=event_types)
+    if position is not None:
+        start_time, pk = position
+        events = events.filter(
+            Q(start_time__gt=start_time) | Q(start_time=start_time, pk__gt=pk)
+        )
+    events = list(events[: limit + 1])
+
+    next_url = None
+    if len(events) > limit:
+        events = events[:limit]
+        query = request.GET.copy()
+        query["cursor"] = _encode_cursor(events[-1])
+        next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+    data = {
+        "events": [
+            {
+                "id": event.web_id,
+                "url": request.build_absolute_uri(
+                    reverse("event_redirect", args=[event.web_id])
+                ),
+                "start_time": event.start_time,
+                "event_type": event.event_type,
+                "event_title": event.event_title,
+                "referent": event.referent,
+                "location": event.location,
+                "status": event.status,
+                "needs_reservation": event.needs_reservation,
+                "reservable": event.needs_reservation and event.is_reservable,
+                "reservation_date": event.first_reservation_date,
+            }
+            for event in events
+        ],
+        "next": next_url,
+    }
+    return _conditional_response(
+        request,
+        json.dumps(data, cls=DjangoJSONEncoder),
+        "application/json",
+        max_age=60,
+    )
@@ -1 +1,25 @@
 # Wagtail hooks for custom functionality
+from wagtail import hooks
+
+from home.page_cache import mark_page_cacheable
+
+
+@hooks.register("on_serve_page")
+def mark_page_for_page_cache(next_serve_page):
+    """Allow the page cache middleware to store the response of a served page."""
+
+    def serve_page(page, request, args, kwargs):
+        mark_page_cacheable(request, page)
+        return next_serve_page(page, request, args, kwargs)
+
+    return serve_page
+
+
+@hooks.register("before_serve_document")
+def ensure_document_file_hash(document, request):
+    """
+    Documents are served with their file hash as ETag. Compute it for
+    documents that were created without one, e.g. by an import.
+    """
+    if not document.file_hash:
+        document.get_file_hash()
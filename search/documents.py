@@ -0,0 +1,212 @@
+"""
+Typed search over the pages of the site.
+
+Every live page is found as one of a few document types: events, photos,
+videos and other content pages. The type, event type and date filters are
+applied to the page queryset before it is searched, which returns the IDs of
+all results, best match first. The facets are counted by the database with
+one grouped query over all results. Only the results shown on a results page
+are then loaded as their specific models, with one query per page type.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import BooleanField, Case, Count, Q, Value, When
+from django.db.models.functions import Coalesce, ExtractYear, TruncDate
+from wagtail.models import Page
+from wagtail.query import PageQuerySet
+
+# Document types in the order they are offered as facets
+DOCUMENT_TYPES = {
+    "event": "Veranstaltungen",
+    "photo": "Fotos",
+    "video": "Videos",
+    "page": "Seiten",
+}
+# Pages of all other models are content pages
+MODEL_DOCUMENT_TYPES = {
+    "home.SingleEvent": "event",
+    "home.PhotoPage": "photo",
+    "home.VideoPage": "video",
+}
+RESULTS_PER_PAGE = 10
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """Restrictions of the results; empty sets and None do not restrict."""
+
+    document_types: frozenset[str] = frozenset()
+    event_types: frozenset[str] = frozenset()
+    date_from: date | None = None
+    date_to: date | None = None
+
+
+@dataclass(frozen=True)
+class Facets:
+    """Number of results per value, each counted with the other filters applied."""
+
+    document_types: dict[str, int]
+    event_types: dict[str, int]
+    years: dict[int, int]
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """The IDs of all results, best match first, and their facets."""
+
+    page_ids: list[int]
+    facets: Facets
+
+
+def _get_content_type_ids() -> dict[str, int]:
+    # Content types are cached by Django, this does not query the database
+    return {
+        document_type: ContentType.objects.get_for_model(apps.get_model(label)).pk
+        for label, document_type in MODEL_DOCUMENT_TYPES.items()
+    }
+
+
+def _get_document_type(content_type_id: int) -> str:
+    document_types = {pk: name for name, pk in _get_content_type_ids().items()}
+    return document_types.get(content_type_id, "page")
+
+
+def _get_document_type_filter(document_types: frozenset[str]) -> Q:
+    content_type_ids = _get_content_type_ids()
+    condition = Q()
+    for document_type in document_types:
+        if document_type == "page":
+            condition |= ~Q(content_type__in=content_type_ids.values())
+        else:
+            condition |= Q(content_type=content_type_ids[document_type])
+    return condition
+
+
+def _get_item_date():
+    """The date of an event, photo or video, NULL for other pages."""
+    return Coalesce(
+        TruncDate("singleevent__start_time"), "photopage__date", "videopage__date"
+    )
+
+
+def _get_date_range_filter(filters: SearchFilters) -> Q:
+    condition = Q()
+    if filters.date_from is not None:
+        condition &= Q(item_date__gte=filters.date_from)
+    if filters.date_to is not None:
+        condition &= Q(item_date__lte=filters.date_to)
+    return condition
+
+
+def _filter_pages(pages: PageQuerySet, filters: SearchFilters) -> PageQuerySet:
+    if filters.document_types:
+        pages = pages.filter(_get_document_type_filter(filters.document_types))
+    # The search backend only filters on the fields of Page, the fields of the
+    # specific page types are filtered in a subquery
+    matching = Page.objects.all()
+    if filters.event_types:
+        matching = matching.filter(singleevent__event_type__in=filters.event_types)
+    if filters.date_from is not None or filters.date_to is not None:
+        matching = matching.annotate(item_date=_get_item_date()).filter(
+            _get_date_range_filter(filters)
+        )
+    if matching.query.has_filters():
+        pages = pages.filter(pk__in=matching.values("pk"))
+    return pages
+
+
+def _search(pages: PageQuerySet, query: str, filters: SearchFilters):
+    return _filter_pages(pages, filters).only("id").search(query)
+
+
+def _get_facets(pages: PageQuerySet, query: str, filters: SearchFilters) -> Facets:
+    """
+    Count the results per document type, event type and year. Each facet
+    ignores its own filter, so the counts tell how many results choosing
+    another value would give.
+
+    The unfiltered results are counted in one query, grouped by content type,
+    event type, year and whether they lie in the date range. The few groups
+    are then added up per facet, applying the other filters in Python.
+    """
+    from home.models import EventTypes
+
+    date_range = _get_date_range_filter(filters)
+    in_date_range = (
+        Case(
+            When(date_range, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+        if date_range
+        else Value(True)
+    )
+    groups = (
+        pages.only("id")
+        .search(query)
+        .get_queryset()
+        .annotate(item_date=_get_item_date())
+        .annotate(year=ExtractYear("item_date"), in_date_range=in_date_range)
+        .order_by()
+        .values("content_type", "singleevent__event_type", "year", "in_date_range")
+        .annotate(count=Count("pk"))
+    )
+
+    document_types = dict.fromkeys(DOCUMENT_TYPES, 0)
+    event_types: dict[str, int] = {}
+    years: dict[int, int] = {}
+    for group in groups:
+        document_type = _get_document_type(group["content_type"])
+        event_type = group["singleevent__event_type"]
+        matches_document_type = (
+            not filters.document_types or document_type in filters.document_types
+        )
+        matches_event_type = (
+            not filters.event_types or event_type in filters.event_types
+        )
+        count = group["count"]
+        if matches_event_type and group["in_date_range"]:
+            document_types[document_type] += count
+        if event_type is not None and matches_document_type and group["in_date_range"]:
+            event_types[event_type] = event_types.get(event_type, 0) + count
+        if group["year"] is not None and matches_document_type and matches_event_type:
+            years[group["year"]] = years.get(group["year"], 0) + count
+    return Facets(
+        document_types={name: count for name, count in document_types.items() if count},
+        # Most results first, otherwise in the order of the event types
+        event_types={
+            event_type: event_types[event_type]
+            for event_type in sorted(
+                (value for value in EventTypes.values if value in event_types),
+                key=lambda value: -event_types[value],
+            )
+        },
+        years=dict(sorted(years.items(), reverse=True)),
+    )
+
+
+def search(query: str, filters: SearchFilters | None = None) -> SearchResult:
+    """
+    Search the live, public pages, returning the IDs of all results, best match
+    first, and their facets.
+    """
+    if filters is None:
+        filters = SearchFilters()
+    # Looks up the view restrictions once for both queries of the search
+    pages = Page.objects.live().public()
+    return SearchResult(
+        page_ids=[result.pk for result in _search(pages, query, filters)],
+        facets=_get_facets(pages, query, filters),
+    )
+
+
+def get_pages(page_ids: list[int]) -> list[Page]:
+    """Load the pages with the given IDs as their specific models, in order."""
+    pages = Page.objects.filter(pk__in=page_ids).specific().in_bulk()
+    return [pages[page_id] for page_id in page_ids if page_id in pages]
@@ -0,0 +1,100 @@
+"""
+In-process cache of search results.
+
+Popular searches such as "Beobachtungsabend" or the names of speakers are
+repeated constantly, and visitors page through their results. The IDs of all
+results and the facets are kept per normalised query and filters in a small
+LRU cache for a minute, so repeated searches and their other results pages
+only load the pages shown, with one query per page type.
+
+Entries are tied to a search generation in the default cache, which changes
+whenever a page is published, unpublished, moved or deleted. If
+DJANGO_CACHE_BACKEND is "file" or "redis", every worker process notices
+changes made in another one right away; with the default per-process
+"locmem" cache, only once its entries expire after SEARCH_RESULTS_TTL.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from search.documents import SearchFilters, SearchResult, search
+
+GENERATION_KEY = "search:result_cache:generation"
+# Seconds an entry is kept before the search is run again
+SEARCH_RESULTS_TTL = 60
+# Entries kept per process, the least recently used ones are dropped first
+SEARCH_RESULTS_MAX_ENTRIES = 256
+
+
+@dataclass(frozen=True)
+class _CacheEntry:
+    generation: str
+    loaded_at: float
+    result: SearchResult
+
+
+_results: OrderedDict[tuple[str, SearchFilters], _CacheEntry] = OrderedDict()
+_lock = threading.Lock()
+
+
+def normalise_query(query: str) -> str:
+    """Return the query in the form used as cache key, the search ignores case."""
+    return " ".join(query.casefold().split())
+
+
+def get_generation() -> str:
+    """
+    Return the search generation, which changes whenever search results may
+    have changed, e.g. because a page was published.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid4().hex, timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def get_search_result(query: str, filters: SearchFilters) -> SearchResult:
+    """Return the result of search(), reusing it for repeated searches."""
+    key = (normalise_query(query), filters)
+    generation = get_generation()
+    with _lock:
+        entry = _results.get(key)
+        if (
+            entry is not None
+            and entry.generation == generation
+            and monotonic() - entry.loaded_at <= SEARCH_RESULTS_TTL
+        ):
+            _results.move_to_end(key)
+            return entry.result
+
+    # Search outside of the lock, concurrent misses only search twice
+    entry = _CacheEntry(
+        generation=generation,
+        loaded_at=monotonic(),
+        result=search(key[0], filters),
+    )
+    with _lock:
+        _results[key] = entry
+        _results.move_to_end(key)
+        while len(_results) > SEARCH_RESULTS_MAX_ENTRIES:
+            _results.popitem(last=False)
+    return entry.result
+
+
+def invalidate_search_results() -> None:
+    """Make all processes search again, e.g. because a page was published."""
+    cache.set(GENERATION_KEY, uuid4().hex, timeout=None)
+
+
+def clear_search_results() -> None:
+    """Drop all entries, e.g. after the database was reset between tests."""
+    with _lock:
+        _results.clear()
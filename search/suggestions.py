@@ -0,0 +1,172 @@
+"""
+Suggestions for the search field while the visitor types.
+
+Page titles, event titles, speakers and event types are loaded once into an
+in-memory prefix tree of their words, so suggestions are looked up without
+any query and without running the full-text search. Suggestions naming
+several pages, e.g. a speaker giving many talks, come first.
+
+The tree is tied to the search generation of the result cache, which changes
+whenever a page is published, unpublished, moved or deleted, and is rebuilt
+on the next lookup. The generation is only shared between processes if
+DJANGO_CACHE_BACKEND is "file" or "redis". With the default per-process
+"locmem" cache, pages published by another process, e.g. by the
+publish_scheduled command, are suggested once the tree expires after
+SUGGESTIONS_TTL seconds.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from time import monotonic
+
+from wagtail.models import Page
+
+from search.result_cache import get_generation
+
+SUGGESTIONS_LIMIT = 8
+# Seconds the tree is kept before it is built again
+SUGGESTIONS_TTL = 300
+# Shorter prefixes match too many words to be useful
+MIN_PREFIX_LENGTH = 2
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    text: str
+    # "title", "speaker" or "event_type"
+    kind: str
+
+
+@dataclass
+class _Node:
+    children: dict[str, _Node] = field(default_factory=dict)
+    # Indices of the suggestions with a word starting with the prefix of
+    # this node, most frequent suggestion first
+    suggestions: list[int] = field(default_factory=list)
+
+
+class SuggestionTree:
+    """Prefix tree of the words of the suggestions."""
+
+    def __init__(self, weights: Counter[Suggestion]):
+        self.suggestions = [
+            suggestion
+            for suggestion, _ in sorted(
+                weights.items(), key=lambda item: (-item[1], item[0].text)
+            )
+        ]
+        self._words = [_get_words(suggestion.text) for suggestion in self.suggestions]
+        self._root = _Node()
+        # Suggestions are added by descending weight, so each node lists them
+        # in that order without sorting
+        for index, words in enumerate(self._words):
+            for word in set(words):
+                node = self._root
+                for char in word:
+                    node = node.children.setdefault(char, _Node())
+                    if not node.suggestions or node.suggestions[-1] != index:
+                        node.suggestions.append(index)
+
+    def _find_node(self, prefix: str) -> _Node | None:
+        node = self._root
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                return None
+            node = child
+        return node
+
+    def lookup(self, query: str, limit: int = SUGGESTIONS_LIMIT) -> list[Suggestion]:
+        """
+        Return the suggestions with a word starting with each word of the
+        query, e.g. "joh kep" suggests "Dr. Johannes Kepler".
+        """
+        terms = _get_words(query)
+        if not terms or max(len(term) for term in terms) < MIN_PREFIX_LENGTH:
+            return []
+        # The longest term has the fewest candidates, the others are checked
+        # against the words of each candidate
+        longest = max(terms, key=len)
+        node = self._find_node(longest)
+        if node is None:
+            return []
+        results = []
+        for index in node.suggestions:
+            words = self._words[index]
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                results.append(self.suggestions[index])
+                if len(results) == limit:
+                    break
+        return results
+
+
+def _get_words(text: str) -> list[str]:
+    return "".join(char if char.isalnum() else " " for char in text.casefold()).split()
+
+
+def _load_suggestions() -> Counter[Suggestion]:
+    from home.models import SingleEvent
+
+    weights: Counter[Suggestion] = Counter()
+    # Event pages are titled with their date, their event titles are used instead
+    for title in (
+        Page.objects.live()
+        .public()
+        .not_type(SingleEvent)
+        .exclude(depth=1)
+        .values_list("title", flat=True)
+    ):
+        weights[Suggestion(title, "title")] += 1
+    events = SingleEvent.objects.live().public()
+    for event_title, referent, event_type in events.values_list(
+        "event_title", "referent", "event_type"
+    ):
+        if event_title:
+            weights[Suggestion(event_title, "title")] += 1
+        if referent:
+            weights[Suggestion(referent, "speaker")] += 1
+        weights[Suggestion(event_type, "event_type")] += 1
+    return weights
+
+
+@dataclass(frozen=True)
+class _TreeEntry:
+    generation: str
+    loaded_at: float
+    tree: SuggestionTree
+
+    def is_current(self, generation: str) -> bool:
+        return (
+            self.generation == generation
+            and monotonic() - self.loaded_at <= SUGGESTIONS_TTL
+        )
+
+
+_entry: _TreeEntry | None = None
+_lock = threading.Lock()
+
+
+def get_suggestions(query: str, limit: int = SUGGESTIONS_LIMIT) -> list[Suggestion]:
+    """Return suggestions for a partially typed search query."""
+    global _entry
+    generation = get_generation()
+    entry = _entry
+    if entry is None or not entry.is_current(generation):
+        with _lock:
+            # Another thread may have built the tree while this one waited
+            entry = _entry
+            if entry is None or not entry.is_current(generation):
+                entry = _TreeEntry(
+                    generation, monotonic(), SuggestionTree(_load_suggestions())
+                )
+                _entry = entry
+    return entry.tree.lookup(query, limit)
+
+
+def clear_suggestions() -> None:
+    """Drop the tree, e.g. after the database was reset between tests."""
+    global _entry
+    _entry = None
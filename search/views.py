@@ -1,7 +1,21 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from datetime import date
+
+from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.template.response import TemplateResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
 
-from wagtail.models import Page
+from home.models import EventTypes
+from search.documents import (
+    DOCUMENT_TYPES,
+    RESULTS_PER_PAGE,
+    Facets,
+    SearchFilters,
+    get_pages,
+)
+from search.result_cache import get_search_result
+from search.suggestions import get_suggestions
 
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
@@ -11,30 +25,111 @@ from wagtail.models import Page
 # from wagtail.contrib.search_promotions.models import Query
 
 
+def _get_filters(request) -> SearchFilters:
+    """Return the filters of the query string, raising ValueError for invalid ones."""
+    document_types = request.GET.getlist("type")
+    if not set(document_types) <= DOCUMENT_TYPES.keys():
+        raise ValueError("Unknown document type")
+    try:
+        event_types = [
+            EventTypes[name.upper()].value for name in request.GET.getlist("event_type")
+        ]
+    except KeyError as e:
+        raise ValueError("Unknown event type") from e
+    date_from, date_to = (request.GET.get(name) for name in ("from", "to"))
+    return SearchFilters(
+        document_types=frozenset(document_types),
+        event_types=frozenset(event_types),
+        date_from=date.fromisoformat(date_from) if date_from else None,
+        date_to=date.fromisoformat(date_to) if date_to else None,
+    )
+
+
+def _get_facet_link(request, label, count: int, active: bool, **params) -> dict:
+    """
+    Return a link choosing a facet value, replacing the given parameters of
+    the query string, or removing them again if the value is chosen already.
+    """
+    query = request.GET.copy()
+    query.pop("page", None)
+    for name, value in params.items():
+        query.setlist(name, [] if active else [value])
+    return {
+        "label": label,
+        "count": count,
+        "active": active,
+        "url": f"{request.path}?{query.urlencode()}",
+    }
+
+
+def _get_facet_links(request, filters: SearchFilters, facets: Facets) -> dict:
+    event_type_names = {event_type.value: event_type.name for event_type in EventTypes}
+    return {
+        "document_types": [
+            _get_facet_link(
+                request,
+                DOCUMENT_TYPES[name],
+                count,
+                active=name in filters.document_types,
+                type=name,
+            )
+            for name, count in facets.document_types.items()
+        ],
+        "event_types": [
+            _get_facet_link(
+                request,
+                event_type,
+                count,
+                active=event_type in filters.event_types,
+                event_type=event_type_names[event_type].lower(),
+            )
+            for event_type, count in facets.event_types.items()
+        ],
+        "years": [
+            _get_facet_link(
+                request,
+                year,
+                count,
+                active=(filters.date_from, filters.date_to)
+                == (date(year, 1, 1), date(year, 12, 31)),
+                **{"from": f"{year}-01-01", "to": f"{year}-12-31"},
+            )
+            for year, count in facets.years.items()
+        ],
+    }
+
+
 def search(request):
+    """
+    Search the live pages. ?type= (event, photo, video or page) and
+    ?event_type= (e.g. talk) are repeatable, ?from= and ?to= limit the results
+    to events, photos and videos of a date range (YYYY-MM-DD).
+    """
     search_query = request.GET.get("query", None)
     page = request.GET.get("page", 1)
+    try:
+        filters = _get_filters(request)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid search filter")
 
     # Search
+    facet_links = None
     if search_query:
-        search_results = Page.objects.live().search(search_query)
+        result = get_search_result(search_query, filters)
+        facet_links = _get_facet_links(request, filters, result.facets)
 
         # To log this query for use with the "Promoted search results" module:
 
         # query = Query.get(search_query)
         # query.add_hit()
 
+        page_ids = result.page_ids
     else:
-        search_results = Page.objects.none()
+        page_ids = []
 
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+    # Pagination over the IDs of the results, only the pages shown are loaded
+    search_results = Paginator(page_ids, RESULTS_PER_PAGE).get_page(page)
+    search_results.object_list = get_pages(search_results.object_list)
 
     return TemplateResponse(
         request,
@@ -42,5 +137,26 @@ def search(request):
         {
             "search_query": search_query,
             "search_results": search_results,
+            "filters": filters,
+            "facets": facet_links,
         },
     )
+
+
+@require_safe
+def suggest(request):
+    """
+    Suggest page titles, speakers and event types for the partially typed
+    ?query= of the search field.
+    """
+    suggestions = get_suggestions(request.GET.get("query", ""))
+    response = JsonResponse(
+        {
+            "suggestions": [
+                {"text": suggestion.text, "kind": suggestion.kind}
+                for suggestion in suggestions
+            ]
+        }
+    )
+    patch_cache_control(response, public=True, max_age=60)
+    return response